@@ -5,19 +5,24 @@ Supports both local .env files and Streamlit Cloud secrets
 import os
 from dotenv import load_dotenv
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 
 # Load environment variables from .env file (for local development)
 load_dotenv()
 
+# Read Streamlit secrets once; st.secrets parses secrets.toml lazily and
+# raises when the file is missing, so don't go through it per key
+try:
+    _SECRETS = dict(st.secrets)
+except (FileNotFoundError, StreamlitAPIException):
+    _SECRETS = {}
+
 # Helper function to get config values from Streamlit secrets or environment variables
 def get_config(key: str, default: str = ''):
     """Get configuration from Streamlit secrets (if deployed) or environment variables (if local)"""
-    try:
-        # Try Streamlit secrets first (for deployment)
-        if hasattr(st, 'secrets') and key in st.secrets:
-            return st.secrets[key]
-    except:
-        pass
+    # Try Streamlit secrets first (for deployment)
+    if key in _SECRETS:
+        return _SECRETS[key]
     # Fallback to environment variables (for local development)
     return os.getenv(key, default)
 
@@ -47,7 +47,9 @@ CREATE TABLE IF NOT EXISTS affected_regions (
     -- Indexes for query optimization
     INDEX idx_risk_level (risk_level),
     INDEX idx_warning_status (warning_status),
-    INDEX idx_region_name (region_name)
+    INDEX idx_region_name (region_name),
+    -- High-risk regions by population: read in index order, no filesort
+    INDEX idx_risk_population (risk_level, population)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='Regions affected by disasters';
 
 -- ================================================================
@@ -68,7 +70,9 @@ CREATE TABLE IF NOT EXISTS alerts (
     INDEX idx_region (region),
     INDEX idx_status (status),
     INDEX idx_date_issued (date_issued),
-    INDEX idx_expiry_date (expiry_date)
+    INDEX idx_expiry_date (expiry_date),
+    -- Newest-first active alerts: backward scan, expiry checked in the index
+    INDEX idx_issued_expiry (date_issued, expiry_date)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='Disaster alerts and warnings';
 
 -- ================================================================
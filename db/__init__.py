@@ -3,15 +3,44 @@ Database Package
 Handles MySQL database connections and queries for Cloudburst Management System
 """
 
-from .connection import DatabaseConnection, get_database_connection, init_connection
-from .queries import QueryHelper
+from .connection import (
+    DatabaseConnection,
+    get_database_connection,
+    init_connection,
+    cached_query,
+    cached_dataframe,
+    cached_summary,
+    cached_reference,
+    clear_query_cache,
+    report_error,
+    list_tables,
+    describe_table,
+    quote_table,
+)
 
 __all__ = [
     'DatabaseConnection',
     'get_database_connection',
     'init_connection',
+    'cached_query',
+    'cached_dataframe',
+    'cached_summary',
+    'cached_reference',
+    'clear_query_cache',
+    'report_error',
+    'list_tables',
+    'describe_table',
+    'quote_table',
     'QueryHelper'
 ]
 
 __version__ = '1.0.0'
 __author__ = 'Mahad Iqbal'
+
+
+def __getattr__(name):
+    """Import QueryHelper on first access (PEP 562) to keep package import light"""
+    if name == 'QueryHelper':
+        from .queries import QueryHelper
+        return QueryHelper
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,65 +1,204 @@
 """
 Database Connection Module
 Handles MySQL connection setup and management
+
+pandas and mysql.connector are imported on first use rather than at module
+import, so pages that never touch the database start faster.
 """
 
-import mysql.connector
-from mysql.connector import Error
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 import streamlit as st
-from typing import Optional
-import pandas as pd
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+POOL_NAME = "cb_pool"
+POOL_SIZE = 10
+# mysql.connector raises as soon as every pooled connection is in use, so
+# checkouts retry for up to POOL_WAIT_TIMEOUT seconds first
+POOL_WAIT_TIMEOUT = 5.0
+POOL_WAIT_INTERVAL = 0.02
+FETCH_CHUNK_SIZE = 1000
+# Threads concurrent reads fan out over. One executor is shared by every
+# session on a connection, and it stays below POOL_SIZE, so simultaneous
+# fan-outs queue for a thread instead of exhausting the pool
+GATHER_WORKERS = 8
+WRITE_BATCH_SIZE = 1000
+# Seconds a persisted reference lookup is reused before it is read again
+REFERENCE_TTL = 600
+
+# Per-thread list of messages held back by report_error inside gather_calls
+_error_sink = threading.local()
+
+
+def report_error(message: str):
+    """
+    Show an error on the page
+    
+    Inside a gather_calls worker the message is held instead, and
+    gather_calls renders it on the script thread once every call is done,
+    so errors appear in call order.
+    """
+    errors = getattr(_error_sink, 'errors', None)
+    if errors is None:
+        st.error(message)
+    else:
+        errors.append(message)
 
 
 class DatabaseConnection:
-    """Manages MySQL database connections for the Cloudburst Management System"""
+    """Manages pooled MySQL connections for the Cloudburst Management System"""
     
     def __init__(self):
         """Initialize database connection parameters"""
-        self.connection = None
-        self.cursor = None
+        self.pool = None
+        self._pool_config = {}
+        self._last_ping = 0.0
+        self._alive_cached = False
+        self._executor = None
+        self._executor_lock = threading.Lock()
     
     def connect(self, host: str = "localhost", 
                 database: str = "cloudburst_management",
                 user: str = "root", 
-                password: str = "") -> bool:
+                password: str = "",
+                port: int = 3306) -> bool:
         """
-        Establish connection to MySQL database
+        Create the MySQL connection pool
         
         Args:
             host: Database host address
             database: Database name
             user: Database username
             password: Database password
+            port: Database port
             
         Returns:
             bool: True if connection successful, False otherwise
         """
+        from mysql.connector import Error, pooling
+        
+        self._pool_config = {
+            'host': host,
+            'database': database,
+            'user': user,
+            'password': password,
+            'port': int(port)
+        }
+        
+        self._last_ping = 0.0
         try:
-            self.connection = mysql.connector.connect(
-                host=host,
-                database=database,
-                user=user,
-                password=password
-            )
-            
-            if self.connection.is_connected():
-                self.cursor = self.connection.cursor(dictionary=True)
+            try:
+                self._create_pool(pooling, use_pure=False)
+            except ImportError:
+                # C extension not installed or not loadable on this host
+                self._create_pool(pooling, use_pure=True)
+            if self.is_connected():
                 return True
+            # Don't leave a pool that can't reach the server looking usable
+            self.pool = None
             return False
             
         except Error as e:
+            self.pool = None
             st.error(f"Database connection error: {e}")
             return False
     
+    def _create_pool(self, pooling, use_pure: bool):
+        """
+        Build the connection pool
+        
+        Args:
+            pooling: The mysql.connector.pooling module
+            use_pure: False to decode rows with the C extension, True for
+                the pure-Python protocol
+        """
+        self.pool = pooling.MySQLConnectionPool(
+            pool_name=POOL_NAME,
+            pool_size=POOL_SIZE,
+            pool_reset_session=True,
+            use_pure=use_pure,
+            **self._pool_config
+        )
+    
     def disconnect(self):
-        """Close database connection safely"""
+        """
+        Evict this connection from the shared cache
+        
+        The instance is shared by every session on the same credentials, so
+        the pool and executor are left alone for sessions still using them.
+        The next init_connection() builds a fresh instance, and the old
+        pool's connections close once nothing references it.
+        """
+        clear_query_cache()
+        if self._pool_config:
+            c = self._pool_config
+            get_database_connection.clear(c['host'], c['database'], c['user'],
+                                          c['password'], c['port'])
+    
+    def _checkout(self):
+        """
+        Borrow a pooled connection, waiting for one to be returned if the
+        pool is momentarily exhausted
+        
+        Returns:
+            Pooled connection; closing it returns it to the pool
+            
+        Raises:
+            PoolError: If no connection came free within POOL_WAIT_TIMEOUT
+        """
+        from mysql.connector.errors import PoolError
+        
+        deadline = time.monotonic() + POOL_WAIT_TIMEOUT
+        while True:
+            try:
+                return self.pool.get_connection()
+            except PoolError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(POOL_WAIT_INTERVAL)
+    
+    def is_connected(self) -> bool:
+        """
+        Check that a pooled connection can be borrowed and reaches the server
+        
+        Returns:
+            bool: True if the database is reachable, False otherwise
+        """
+        from mysql.connector import Error
+        
+        if self.pool is None:
+            return False
         try:
-            if self.cursor:
-                self.cursor.close()
-            if self.connection and self.connection.is_connected():
-                self.connection.close()
-        except Error as e:
-            st.error(f"Error closing connection: {e}")
+            with self._checkout() as conn:
+                return conn.is_connected()
+        except Error:
+            return False
+    
+    def alive(self, ttl: float = 10.0) -> bool:
+        """
+        Cached liveness check; pings the server at most once per `ttl` seconds
+        
+        Args:
+            ttl: Seconds a successful ping is trusted for
+            
+        Returns:
+            bool: True if the database was reachable on the last ping
+        """
+        now = time.monotonic()
+        if self._alive_cached and now - self._last_ping < ttl:
+            return True
+        self._alive_cached = self.is_connected()
+        self._last_ping = now
+        return self._alive_cached
     
     def execute_query(self, query: str, params: tuple = None) -> Optional[list]:
         """
@@ -72,19 +211,109 @@ class DatabaseConnection:
         Returns:
             List of dictionaries containing query results
         """
+        from mysql.connector import Error
+        
         try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            
-            results = self.cursor.fetchall()
-            return results
-            
+            return self._fetch_all(query, params)
         except Error as e:
-            st.error(f"Query execution error: {e}")
+            report_error(f"Query execution error: {e}")
             return None
     
+    def _fetch_all(self, query: str, params: tuple = None) -> list:
+        """Run a SELECT on a pooled connection; errors propagate to the caller"""
+        with self._checkout() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """The executor shared by gather_queries and gather_calls, created on first use"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=GATHER_WORKERS, thread_name_prefix="cb-gather"
+                )
+            return self._executor
+    
+    def gather_queries(self, *queries) -> list:
+        """
+        Run independent SELECT queries concurrently, each on its own pooled
+        connection, and wait for all of them
+        
+        Args:
+            queries: SQL strings, or (sql, params) tuples
+            
+        Returns:
+            One result per query, in order: a list of dictionaries, or None
+            if that query failed
+        """
+        from mysql.connector import Error
+        
+        normalized = [(q, None) if isinstance(q, str) else tuple(q) for q in queries]
+        executor = self._get_executor()
+        futures = [executor.submit(self._fetch_all, query, params)
+                   for query, params in normalized]
+        
+        # Errors are reported here: st.error only works on the script thread
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Error as e:
+                st.error(f"Query execution error: {e}")
+                results.append(None)
+        return results
+    
+    def gather_calls(self, *calls) -> list:
+        """
+        Run independent fetch functions concurrently and wait for all of them
+        
+        The calls run on the same bounded executor as gather_queries, with
+        the caller's script run context attached so st.cache_data behaves as
+        it does on the script thread. A call must not gather in turn, or it
+        can wait on a thread that is waiting for it.
+        
+        Errors the calls report through report_error are rendered here, on
+        the script thread, in call order after all of them finish.
+        
+        Args:
+            calls: Functions taking no arguments
+            
+        Returns:
+            Each call's return value, in order (the first exception is
+            re-raised after every call's errors are shown)
+        """
+        ctx = get_script_run_ctx()
+        
+        def run(call):
+            add_script_run_ctx(threading.current_thread(), ctx)
+            _error_sink.errors = errors = []
+            try:
+                return call(), errors, None
+            except Exception as e:
+                return None, errors, e
+            finally:
+                _error_sink.errors = None
+        
+        executor = self._get_executor()
+        futures = [executor.submit(run, call) for call in calls]
+        
+        results = []
+        first_exc = None
+        for future in futures:
+            value, errors, exc = future.result()
+            for message in errors:
+                st.error(message)
+            if first_exc is None:
+                first_exc = exc
+            results.append(value)
+        if first_exc is not None:
+            raise first_exc
+        return results
+    
     def execute_update(self, query: str, params: tuple = None) -> bool:
         """
         Execute INSERT, UPDATE, or DELETE query
@@ -96,21 +325,74 @@ class DatabaseConnection:
         Returns:
             bool: True if successful, False otherwise
         """
+        from mysql.connector import Error
+        
         try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            
-            self.connection.commit()
+            with self._checkout() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(query, params)
+                    conn.commit()
+                except Error:
+                    # Nothing to undo if the failure came before any write
+                    if conn.in_transaction:
+                        conn.rollback()
+                    raise
+                finally:
+                    cursor.close()
             return True
             
         except Error as e:
             st.error(f"Update execution error: {e}")
-            self.connection.rollback()
             return False
     
-    def fetch_dataframe(self, query: str, params: tuple = None) -> pd.DataFrame:
+    def insert_many(self, insert_prefix: str, row_placeholder: str, rows: list,
+                    suffix: str = "") -> int:
+        """
+        Insert many rows as explicit multi-row INSERT statements
+        
+        Each batch of WRITE_BATCH_SIZE rows becomes one
+        INSERT ... VALUES (...), (...), ... statement with the parameters
+        flattened, so the round trips scale with batches, not rows.
+        Everything is committed once at the end.
+        
+        Args:
+            insert_prefix: Statement up to and including VALUES,
+                e.g. "INSERT INTO t (a, b) VALUES "
+            row_placeholder: Placeholder group for one row, e.g. "(%s, %s)"
+            rows: Sequence of parameter tuples
+            suffix: Appended after the VALUES list of every batch,
+                e.g. an ON DUPLICATE KEY UPDATE clause
+            
+        Returns:
+            int: Number of affected rows, or -1 if the batch was rolled back
+        """
+        from mysql.connector import Error
+        
+        affected = 0
+        try:
+            with self._checkout() as conn:
+                cursor = conn.cursor()
+                try:
+                    for start in range(0, len(rows), WRITE_BATCH_SIZE):
+                        batch = rows[start:start + WRITE_BATCH_SIZE]
+                        query = insert_prefix + ", ".join([row_placeholder] * len(batch)) + suffix
+                        cursor.execute(query, tuple(chain.from_iterable(batch)))
+                        affected += cursor.rowcount
+                    conn.commit()
+                except Error:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    raise
+                finally:
+                    cursor.close()
+            return affected
+            
+        except Error as e:
+            st.error(f"Batch insert error: {e}")
+            return -1
+    
+    def fetch_dataframe(self, query: str, params: tuple = None) -> Optional[pd.DataFrame]:
         """
         Execute query and return results as pandas DataFrame
         
@@ -119,18 +401,40 @@ class DatabaseConnection:
             params: Query parameters (optional)
             
         Returns:
-            pandas DataFrame containing query results
+            pandas DataFrame containing query results, or None if the query
+            failed (an empty frame means the query matched no rows)
         """
+        import pandas as pd
+        from mysql.connector import Error
+        
         try:
-            if params:
-                df = pd.read_sql(query, self.connection, params=params)
-            else:
-                df = pd.read_sql(query, self.connection)
-            return df
+            with self._checkout() as conn:
+                # Plain tuple cursor: cheaper per row than dictionaries
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(query, params)
+                    columns = [desc[0] for desc in cursor.description or []]
+                    frames = []
+                    while True:
+                        rows = cursor.fetchmany(FETCH_CHUNK_SIZE)
+                        if not rows:
+                            break
+                        # coerce_float matches read_sql (DECIMAL -> float)
+                        frames.append(pd.DataFrame.from_records(
+                            rows, columns=columns, coerce_float=True
+                        ))
+                finally:
+                    cursor.close()
+            
+            if not frames:
+                return pd.DataFrame(columns=columns)
+            if len(frames) == 1:
+                return frames[0]
+            return pd.concat(frames, ignore_index=True)
             
         except Error as e:
-            st.error(f"DataFrame fetch error: {e}")
-            return pd.DataFrame()
+            report_error(f"DataFrame fetch error: {e}")
+            return None
     
     def get_table_info(self, table_name: str) -> Optional[list]:
         """
@@ -141,26 +445,215 @@ class DatabaseConnection:
             
         Returns:
             List of column definitions
+            
+        Raises:
+            ValueError: If table_name is not a table in the connected schema
         """
-        query = f"DESCRIBE {table_name}"
-        return self.execute_query(query)
+        return describe_table(self, table_name)
 
 
-# Singleton instance for reuse across pages
-@st.cache_resource
-def get_database_connection():
+# One pooled instance per credential set, shared across sessions and reruns
+@st.cache_resource(show_spinner=False)
+def get_database_connection(host: str = "localhost",
+                            database: str = "cloudburst_management",
+                            user: str = "root",
+                            password: str = "",
+                            port: int = 3306) -> DatabaseConnection:
     """
-    Get or create database connection instance
-    Uses Streamlit caching to maintain single connection
+    Get or create the database connection for a set of credentials
+    Uses Streamlit caching keyed on the arguments, so changing any
+    credential produces (and caches) a new pool
     """
     db = DatabaseConnection()
+    db.connect(host, database, user, password, port)
     return db
 
 
+# Read-through caches for SELECTs. The db argument is keyed by identity, which
+# is one object per credential set thanks to get_database_connection().
+# Writes go through db.execute_update() directly; pages that mutate data
+# should call clear_query_cache() afterwards.
+@st.cache_data(ttl=60, max_entries=128, show_spinner=False,
+               hash_funcs={DatabaseConnection: id})
+def cached_query(db: DatabaseConnection, query: str, params: tuple = None) -> Optional[list]:
+    """
+    Cached wrapper around DatabaseConnection.execute_query
+    
+    Args:
+        db: DatabaseConnection instance
+        query: SQL SELECT statement
+        params: Query parameters (optional)
+        
+    Returns:
+        List of dictionaries containing query results
+    """
+    return db.execute_query(query, params)
+
+
+@st.cache_data(ttl=60, max_entries=128, show_spinner=False,
+               hash_funcs={DatabaseConnection: id})
+def cached_dataframe(db: DatabaseConnection, query: str,
+                     params: tuple = None) -> Optional[pd.DataFrame]:
+    """
+    Cached wrapper around DatabaseConnection.fetch_dataframe
+    
+    Args:
+        db: DatabaseConnection instance
+        query: SQL SELECT statement
+        params: Query parameters (optional)
+        
+    Returns:
+        pandas DataFrame containing query results, or None on failure. A
+        failure is cached like any result, so a broken query is not re-run
+        on every rerun until the TTL expires or clear_query_cache() is called.
+    """
+    return db.fetch_dataframe(query, params)
+
+
+# Aggregate summaries (counts and totals by category) move slowly, so they
+# are kept longer than ordinary results; writes and the dashboard's Refresh
+# button still drop them through clear_query_cache()
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False,
+               hash_funcs={DatabaseConnection: id})
+def cached_summary(db: DatabaseConnection, query: str,
+                   params: tuple = None) -> Optional[pd.DataFrame]:
+    """
+    Longer-lived counterpart of cached_dataframe for aggregate summaries
+    
+    Args:
+        db: DatabaseConnection instance
+        query: SQL SELECT statement
+        params: Query parameters (optional)
+        
+    Returns:
+        pandas DataFrame containing query results, or None on failure
+    """
+    return db.fetch_dataframe(query, params)
+
+
+class _ReferenceQueryFailed(Exception):
+    """Raised inside the persisted cache so a failed lookup isn't stored"""
+
+
+# Reference lookups (dropdown values, region and resource lists) are small and
+# rarely change, so they are persisted to disk and survive an app restart.
+# Disk-persisted caches ignore ttl, so the key carries the current
+# REFERENCE_TTL window instead: rows changed outside the app (reload_alerts.py,
+# the SQL scripts, other clients) are picked up within one window.
+# clear_query_cache() drops every entry, on disk too, after in-app writes.
+# Keyed on the server and schema rather than the connection object, whose id
+# doesn't survive a restart.
+@st.cache_data(persist="disk", max_entries=32, show_spinner=False)
+def _persisted_reference(_db: DatabaseConnection, source: str, window: int,
+                         query: str, params: tuple = None) -> pd.DataFrame:
+    df = _db.fetch_dataframe(query, params)
+    if df is None:
+        raise _ReferenceQueryFailed(query)
+    return df
+
+
+def cached_reference(db: DatabaseConnection, query: str,
+                     params: tuple = None) -> Optional[pd.DataFrame]:
+    """
+    Disk-persisted wrapper around DatabaseConnection.fetch_dataframe for
+    read-only reference lookups
+    
+    Args:
+        db: DatabaseConnection instance
+        query: SQL SELECT statement
+        params: Query parameters (optional)
+        
+    Returns:
+        pandas DataFrame containing query results, or None on failure
+        (failures are not cached)
+    """
+    config = db._pool_config
+    source = f"{config.get('host')}:{config.get('port')}/{config.get('database')}"
+    window = int(time.time() // REFERENCE_TTL)
+    try:
+        return _persisted_reference(db, source, window, query, params)
+    except _ReferenceQueryFailed:
+        return None
+
+
+# Schema lookups change far less often than data, so they get a longer TTL
+# and are not dropped by clear_query_cache()
+@st.cache_data(ttl=600, show_spinner=False,
+               hash_funcs={DatabaseConnection: id})
+def list_tables(db: DatabaseConnection) -> frozenset:
+    """
+    Names of the tables in the connected schema
+    
+    Args:
+        db: DatabaseConnection instance
+        
+    Returns:
+        frozenset of table names from information_schema
+    """
+    rows = db.execute_query(
+        "SELECT TABLE_NAME AS name FROM information_schema.tables "
+        "WHERE table_schema = DATABASE()"
+    )
+    return frozenset(row['name'] for row in rows or [])
+
+
+@st.cache_data(ttl=600, show_spinner=False,
+               hash_funcs={DatabaseConnection: id})
+def describe_table(db: DatabaseConnection, table_name: str) -> Optional[list]:
+    """
+    Cached DESCRIBE for a table
+    
+    The name goes through quote_table() before it is spliced into the
+    statement, since DESCRIBE can't take a bound parameter.
+    
+    Args:
+        db: DatabaseConnection instance
+        table_name: Name of the table
+        
+    Returns:
+        List of column definitions (Field, Type, Null, Key, Default, Extra)
+        
+    Raises:
+        ValueError: If table_name is not a table in the connected schema
+    """
+    return db.execute_query(f"DESCRIBE {quote_table(db, table_name)}")
+
+
+def quote_table(db: DatabaseConnection, table_name: str) -> str:
+    """
+    Validate a table name against the schema and backquote it
+    
+    Table names can't be bound as parameters, so any query that takes one
+    from outside should splice in the result of this instead of the raw name.
+    
+    Args:
+        db: DatabaseConnection instance
+        table_name: Name of the table
+        
+    Returns:
+        The backquoted identifier, e.g. `alerts`
+        
+    Raises:
+        ValueError: If table_name is not a table in the connected schema
+    """
+    if table_name not in list_tables(db):
+        raise ValueError(f"Unknown table: {table_name!r}")
+    return f"`{table_name}`"
+
+
+def clear_query_cache():
+    """Drop cached SELECT results after a write so readers see fresh data"""
+    cached_query.clear()
+    cached_dataframe.clear()
+    cached_summary.clear()
+    _persisted_reference.clear()
+
+
 def init_connection(host: str = "localhost",
                    database: str = "cloudburst_management", 
                    user: str = "root",
-                   password: str = "") -> DatabaseConnection:
+                   password: str = "",
+                   port: int = 3306) -> DatabaseConnection:
     """
     Initialize database connection with credentials
     
@@ -169,13 +662,14 @@ def init_connection(host: str = "localhost",
         database: Database name
         user: Database username
         password: Database password
+        port: Database port
         
     Returns:
         DatabaseConnection instance
     """
-    db = get_database_connection()
-    if not db.connection or not db.connection.is_connected():
-        success = db.connect(host, database, user, password)
-        if not success:
-            st.error("Failed to connect to database. Please check credentials.")
+    db = get_database_connection(host, database, user, password, int(port))
+    if db.pool is None:
+        # Don't keep a failed pool cached; the next attempt should retry
+        get_database_connection.clear(host, database, user, password, int(port))
+        st.error("Failed to connect to database. Please check credentials.")
     return db
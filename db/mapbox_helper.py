@@ -3,10 +3,31 @@ Mapbox Integration Module
 Advanced map visualizations using Mapbox and PyDeck
 """
 
-import pydeck as pdk
+from __future__ import annotations
+
+import threading
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 import streamlit as st
-from typing import Optional, List, Dict, Any
+from typing import TYPE_CHECKING, Optional, List
+
+if TYPE_CHECKING:
+    import pydeck as pdk
+
+
+# Categorical marker colors (RGBA), assigned in order of first appearance
+COLOR_PALETTE = np.array([
+    [255, 23, 68, 200],    # Red
+    [255, 111, 0, 200],    # Orange
+    [253, 216, 53, 200],   # Yellow
+    [76, 175, 80, 200],    # Green
+    [79, 195, 247, 200],   # Blue
+    [156, 39, 176, 200],   # Purple
+    [233, 30, 99, 200],    # Pink
+    [0, 188, 212, 200]     # Cyan
+], dtype=np.uint8)
+DEFAULT_MARKER_COLOR = np.array([79, 195, 247, 200], dtype=np.uint8)
 
 
 class MapboxVisualizer:
@@ -49,43 +70,10 @@ class MapboxVisualizer:
         if df.empty or lat_col not in df.columns or lon_col not in df.columns:
             return None
         
-        # Normalize intensity for better visualization
-        max_intensity = df[intensity_col].max()
-        df['normalized_intensity'] = (df[intensity_col] / max_intensity * 100).fillna(0)
-        
-        # Create heatmap layer
-        heatmap_layer = pdk.Layer(
-            "HeatmapLayer",
-            data=df,
-            get_position=[lon_col, lat_col],
-            get_weight='normalized_intensity',
-            radiusPixels=60,
-            intensity=1,
-            threshold=0.05,
-            pickable=False
+        return _build_heatmap_deck(
+            df, lat_col, lon_col, intensity_col, tuple(center), zoom,
+            self.style, self.mapbox_token
         )
-        
-        # Create view state
-        view_state = pdk.ViewState(
-            latitude=center[0],
-            longitude=center[1],
-            zoom=zoom,
-            pitch=0,
-            bearing=0
-        )
-        
-        # Create deck
-        deck = pdk.Deck(
-            layers=[heatmap_layer],
-            initial_view_state=view_state,
-            map_style=self.style,
-            mapbox_key=self.mapbox_token,
-            tooltip={
-                "text": f"{intensity_col}: {{" + intensity_col + "}} mm"
-            }
-        )
-        
-        return deck
     
     def create_marker_map(
         self,
@@ -117,64 +105,11 @@ class MapboxVisualizer:
         if df.empty or lat_col not in df.columns or lon_col not in df.columns:
             return None
         
-        # Prepare color mapping
-        if color_col and color_col in df.columns:
-            color_map = self._get_color_map(df[color_col].unique())
-            df['color'] = df[color_col].map(color_map)
-        else:
-            df['color'] = [[79, 195, 247, 200]] * len(df)  # Default blue
-        
-        # Prepare size
-        if size_col and size_col in df.columns:
-            max_size = df[size_col].max()
-            df['radius'] = (df[size_col] / max_size * 100000).fillna(50000)
-        else:
-            df['radius'] = 50000
-        
-        # Create scatterplot layer
-        scatter_layer = pdk.Layer(
-            "ScatterplotLayer",
-            data=df,
-            get_position=[lon_col, lat_col],
-            get_color='color',
-            get_radius='radius',
-            pickable=True,
-            opacity=0.8,
-            stroked=True,
-            filled=True,
-            radius_scale=1,
-            radius_min_pixels=5,
-            radius_max_pixels=30,
-            line_width_min_pixels=1,
-            get_line_color=[255, 255, 255]
+        return _build_marker_deck(
+            df, lat_col, lon_col, color_col, size_col,
+            tuple(tooltip_cols) if tooltip_cols else None, tuple(center), zoom,
+            self.style, self.mapbox_token
         )
-        
-        # Create view state
-        view_state = pdk.ViewState(
-            latitude=center[0],
-            longitude=center[1],
-            zoom=zoom,
-            pitch=0,
-            bearing=0
-        )
-        
-        # Prepare tooltip
-        tooltip_text = ""
-        if tooltip_cols:
-            tooltip_text = "<br>".join([f"<b>{col}:</b> {{" + col + "}}" for col in tooltip_cols if col in df.columns])
-        else:
-            tooltip_text = "<b>Location:</b> {" + lat_col + "}, {" + lon_col + "}"
-        
-        # Create deck
-        deck = pdk.Deck(
-            layers=[scatter_layer],
-            initial_view_state=view_state,
-            map_style=self.style,
-            mapbox_key=self.mapbox_token,
-            tooltip={"html": tooltip_text, "style": {"color": "white"}}
-        )
-        
-        return deck
     
     def create_hexagon_map(
         self,
@@ -204,46 +139,10 @@ class MapboxVisualizer:
         if df.empty or lat_col not in df.columns or lon_col not in df.columns:
             return None
         
-        # Prepare data
-        if value_col and value_col in df.columns:
-            df['value'] = df[value_col]
-        else:
-            df['value'] = 1
-        
-        # Create hexagon layer
-        hexagon_layer = pdk.Layer(
-            "HexagonLayer",
-            data=df,
-            get_position=[lon_col, lat_col],
-            auto_highlight=True,
-            elevation_scale=50,
-            pickable=True,
-            elevation_range=[0, 3000],
-            extruded=True,
-            coverage=1,
-            radius=radius,
-            get_elevation='value'
+        return _build_hexagon_deck(
+            df, lat_col, lon_col, value_col, tuple(center), zoom, radius,
+            self.style, self.mapbox_token
         )
-        
-        # Create view state
-        view_state = pdk.ViewState(
-            latitude=center[0],
-            longitude=center[1],
-            zoom=zoom,
-            pitch=45,
-            bearing=0
-        )
-        
-        # Create deck
-        deck = pdk.Deck(
-            layers=[hexagon_layer],
-            initial_view_state=view_state,
-            map_style=self.style,
-            mapbox_key=self.mapbox_token,
-            tooltip={"text": "Value: {elevationValue}"}
-        )
-        
-        return deck
     
     def create_arc_map(
         self,
@@ -279,66 +178,244 @@ class MapboxVisualizer:
         if not all(col in df.columns for col in required_cols):
             return None
         
-        # Prepare width
-        if width_col and width_col in df.columns:
-            max_width = df[width_col].max()
-            df['arc_width'] = (df[width_col] / max_width * 10).fillna(1)
-        else:
-            df['arc_width'] = 5
-        
-        # Create arc layer
-        arc_layer = pdk.Layer(
-            "ArcLayer",
-            data=df,
-            get_source_position=[source_lon_col, source_lat_col],
-            get_target_position=[target_lon_col, target_lat_col],
-            get_source_color=[79, 195, 247, 180],
-            get_target_color=[255, 87, 34, 180],
-            get_width='arc_width',
-            pickable=True
-        )
-        
-        # Create view state
-        view_state = pdk.ViewState(
-            latitude=center[0],
-            longitude=center[1],
-            zoom=zoom,
-            pitch=30,
-            bearing=0
-        )
-        
-        # Create deck
-        deck = pdk.Deck(
-            layers=[arc_layer],
-            initial_view_state=view_state,
-            map_style=self.style,
-            mapbox_key=self.mapbox_token
+        return _build_arc_deck(
+            df, source_lat_col, source_lon_col, target_lat_col, target_lon_col,
+            width_col, tuple(center), zoom, self.style, self.mapbox_token
         )
-        
-        return deck
-    
-    def _get_color_map(self, unique_values) -> Dict[Any, List[int]]:
-        """Generate color mapping for categorical values"""
-        colors = [
-            [255, 23, 68, 200],    # Red
-            [255, 111, 0, 200],    # Orange
-            [253, 216, 53, 200],   # Yellow
-            [76, 175, 80, 200],    # Green
-            [79, 195, 247, 200],   # Blue
-            [156, 39, 176, 200],   # Purple
-            [233, 30, 99, 200],    # Pink
-            [0, 188, 212, 200]     # Cyan
-        ]
-        
-        color_map = {}
-        for i, value in enumerate(unique_values):
-            color_map[value] = colors[i % len(colors)]
-        
-        return color_map
 
 
-# Cached instance
-@st.cache_resource
+# Deck construction is cached so a rerun (every pan, zoom or widget change)
+# with the same data and options reuses the deck built last time. Builders
+# only copy the frame when they need a derived column, and constant
+# accessors are passed to deck.gl as scalars instead of filled columns.
+# pydeck is imported inside each builder so importing this module (or the
+# db package) stays cheap until a map is actually drawn.
+_deck_cache = st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+
+
+@_deck_cache
+def _build_heatmap_deck(df: pd.DataFrame, lat_col: str, lon_col: str, intensity_col: str,
+                        center: tuple, zoom: int, style: str, mapbox_token: str) -> pdk.Deck:
+    import pydeck as pdk
+    
+    # Readings without a value would reach deck.gl as NaN, which isn't valid
+    # JSON; they add no weight, so they are left out
+    if df[intensity_col].isna().any():
+        df = df.dropna(subset=[intensity_col])
+    
+    # Create heatmap layer (weights are relative to the largest one, so the
+    # raw column renders the same as a rescaled copy)
+    heatmap_layer = pdk.Layer(
+        "HeatmapLayer",
+        data=df,
+        get_position=[lon_col, lat_col],
+        get_weight=intensity_col,
+        radiusPixels=60,
+        intensity=1,
+        threshold=0.05,
+        pickable=False
+    )
+    
+    # Create view state
+    view_state = pdk.ViewState(
+        latitude=center[0],
+        longitude=center[1],
+        zoom=zoom,
+        pitch=0,
+        bearing=0
+    )
+    
+    # Create deck
+    deck = pdk.Deck(
+        layers=[heatmap_layer],
+        initial_view_state=view_state,
+        map_style=style,
+        mapbox_key=mapbox_token,
+        tooltip={
+            "text": f"{intensity_col}: {{" + intensity_col + "}} mm"
+        }
+    )
+    
+    return deck
+
+
+@_deck_cache
+def _build_marker_deck(df: pd.DataFrame, lat_col: str, lon_col: str,
+                       color_col: Optional[str], size_col: Optional[str],
+                       tooltip_cols: Optional[tuple], center: tuple, zoom: int,
+                       style: str, mapbox_token: str) -> pdk.Deck:
+    import pydeck as pdk
+    
+    df = df.copy()
+    
+    # Prepare color mapping
+    if color_col and color_col in df.columns:
+        df['color'] = _get_colors(df[color_col])
+    else:
+        df['color'] = np.broadcast_to(DEFAULT_MARKER_COLOR, (len(df), 4)).tolist()  # Default blue
+    
+    # Prepare size
+    if size_col and size_col in df.columns:
+        max_size = df[size_col].max()
+        df['radius'] = (df[size_col] / max_size * 100000).fillna(50000)
+        get_radius = 'radius'
+    else:
+        get_radius = 50000
+    
+    # Create scatterplot layer
+    scatter_layer = pdk.Layer(
+        "ScatterplotLayer",
+        data=df,
+        get_position=[lon_col, lat_col],
+        get_color='color',
+        get_radius=get_radius,
+        pickable=True,
+        opacity=0.8,
+        stroked=True,
+        filled=True,
+        radius_scale=1,
+        radius_min_pixels=5,
+        radius_max_pixels=30,
+        line_width_min_pixels=1,
+        get_line_color=[255, 255, 255]
+    )
+    
+    # Create view state
+    view_state = pdk.ViewState(
+        latitude=center[0],
+        longitude=center[1],
+        zoom=zoom,
+        pitch=0,
+        bearing=0
+    )
+    
+    # Prepare tooltip
+    if tooltip_cols:
+        tooltip_cols = tuple(col for col in tooltip_cols if col in df.columns)
+    tooltip_text = _build_tooltip_html(tooltip_cols, lat_col, lon_col)
+    
+    # Create deck
+    deck = pdk.Deck(
+        layers=[scatter_layer],
+        initial_view_state=view_state,
+        map_style=style,
+        mapbox_key=mapbox_token,
+        tooltip={"html": tooltip_text, "style": {"color": "white"}}
+    )
+    
+    return deck
+
+
+@_deck_cache
+def _build_hexagon_deck(df: pd.DataFrame, lat_col: str, lon_col: str,
+                        value_col: Optional[str], center: tuple, zoom: int, radius: int,
+                        style: str, mapbox_token: str) -> pdk.Deck:
+    import pydeck as pdk
+    
+    # Prepare data
+    get_elevation = value_col if value_col and value_col in df.columns else 1
+    
+    # Create hexagon layer
+    hexagon_layer = pdk.Layer(
+        "HexagonLayer",
+        data=df,
+        get_position=[lon_col, lat_col],
+        auto_highlight=True,
+        elevation_scale=50,
+        pickable=True,
+        elevation_range=[0, 3000],
+        extruded=True,
+        coverage=1,
+        radius=radius,
+        get_elevation=get_elevation
+    )
+    
+    # Create view state
+    view_state = pdk.ViewState(
+        latitude=center[0],
+        longitude=center[1],
+        zoom=zoom,
+        pitch=45,
+        bearing=0
+    )
+    
+    # Create deck
+    deck = pdk.Deck(
+        layers=[hexagon_layer],
+        initial_view_state=view_state,
+        map_style=style,
+        mapbox_key=mapbox_token,
+        tooltip={"text": "Value: {elevationValue}"}
+    )
+    
+    return deck
+
+
+@_deck_cache
+def _build_arc_deck(df: pd.DataFrame, source_lat_col: str, source_lon_col: str,
+                    target_lat_col: str, target_lon_col: str, width_col: Optional[str],
+                    center: tuple, zoom: int, style: str, mapbox_token: str) -> pdk.Deck:
+    import pydeck as pdk
+    
+    # Prepare width
+    if width_col and width_col in df.columns:
+        max_width = df[width_col].max()
+        df = df.assign(arc_width=(df[width_col] / max_width * 10).fillna(1))
+        get_width = 'arc_width'
+    else:
+        get_width = 5
+    
+    # Create arc layer
+    arc_layer = pdk.Layer(
+        "ArcLayer",
+        data=df,
+        get_source_position=[source_lon_col, source_lat_col],
+        get_target_position=[target_lon_col, target_lat_col],
+        get_source_color=[79, 195, 247, 180],
+        get_target_color=[255, 87, 34, 180],
+        get_width=get_width,
+        pickable=True
+    )
+    
+    # Create view state
+    view_state = pdk.ViewState(
+        latitude=center[0],
+        longitude=center[1],
+        zoom=zoom,
+        pitch=30,
+        bearing=0
+    )
+    
+    # Create deck
+    deck = pdk.Deck(
+        layers=[arc_layer],
+        initial_view_state=view_state,
+        map_style=style,
+        mapbox_key=mapbox_token
+    )
+    
+    return deck
+
+
+@lru_cache(maxsize=64)
+def _build_tooltip_html(cols: Optional[tuple], lat_col: str, lon_col: str) -> str:
+    """Marker tooltip template; falls back to the coordinates when no columns are given"""
+    if cols is not None:
+        return "<br>".join(f"<b>{col}:</b> {{" + col + "}" for col in cols)
+    return "<b>Location:</b> {" + lat_col + "}, {" + lon_col + "}"
+
+
+def _get_colors(values: pd.Series) -> List[List[int]]:
+    """Per-row RGBA colors for a categorical column, in order of first appearance"""
+    codes, _ = pd.factorize(values, use_na_sentinel=False)
+    return COLOR_PALETTE[codes % len(COLOR_PALETTE)].tolist()
+
+# Last visualizer handed out; a rerun with the same token and style returns it
+# without going through the st.cache_resource key hashing
+_SINGLETON: Optional[MapboxVisualizer] = None
+_SINGLETON_LOCK = threading.Lock()
+
+
 def get_mapbox_visualizer(mapbox_token: str, style: str = "mapbox://styles/mapbox/dark-v11") -> Optional[MapboxVisualizer]:
     """
     Get or create Mapbox visualizer instance
@@ -350,6 +427,22 @@ def get_mapbox_visualizer(mapbox_token: str, style: str = "mapbox://styles/mapbo
     Returns:
         MapboxVisualizer instance or None
     """
+    global _SINGLETON
+    
+    visualizer = _SINGLETON
+    if visualizer is not None and visualizer.mapbox_token == mapbox_token and visualizer.style == style:
+        return visualizer
+    
+    visualizer = _create_mapbox_visualizer(mapbox_token, style)
+    if visualizer is not None:
+        with _SINGLETON_LOCK:
+            _SINGLETON = visualizer
+    return visualizer
+
+
+# Cached instance (one per token/style, for when the token changes)
+@st.cache_resource
+def _create_mapbox_visualizer(mapbox_token: str, style: str) -> Optional[MapboxVisualizer]:
     if not mapbox_token:
         return None
     
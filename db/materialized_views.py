@@ -36,14 +36,48 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional, List, Tuple
 import os
+import numpy as np
 import pandas as pd
+import streamlit as st
 from datetime import datetime, timedelta
 
 from .connection import DatabaseConnection, init_connection
 
+try:
+    from numba import njit
+except ImportError:  # optional; the pandas groupby path is used instead
+    njit = None
+
+try:
+    import polars as pl
+except ImportError:  # optional; refresh_mv_from_csv(engine="polars") falls back to pandas
+    pl = None
+
 
 MV_TABLE_NAME = "mv_region_dashboard"
 
+# Rainfall row count from which the numba kernel replaces the pandas groupby
+NUMBA_MIN_ROWS = 100_000
+_INT64_MIN = np.iinfo(np.int64).min
+
+# Upsert tail shared by both refresh paths: existing regions are updated in
+# place, so readers never see the table empty mid-refresh
+MV_UPSERT_CLAUSE = """
+    ON DUPLICATE KEY UPDATE
+        population = VALUES(population),
+        risk_level = VALUES(risk_level),
+        active_alerts_count = VALUES(active_alerts_count),
+        highest_active_severity = VALUES(highest_active_severity),
+        total_resources_available = VALUES(total_resources_available),
+        distributions_last_7d = VALUES(distributions_last_7d),
+        latest_rainfall_mm = VALUES(latest_rainfall_mm),
+        avg_rainfall_7d = VALUES(avg_rainfall_7d),
+        last_refreshed = NOW()"""
+
+# Severity labels in rank order; position is the rank used for max_sev_rank
+SEVERITY_ORDER = ["(none)", "Low", "Moderate", "High", "Critical"]
+SEVERITY_LABELS = np.array([None] + SEVERITY_ORDER[1:], dtype=object)
+
 
 @dataclass
 class MVRow:
@@ -58,6 +92,59 @@ class MVRow:
     avg_rainfall_7d: Optional[float]
 
 
+@st.cache_data(max_entries=16, show_spinner=False)
+def _read_csv_cached(path: str, mtime: float) -> pd.DataFrame:
+    """Parse a CSV with the multi-threaded Arrow reader; keyed on mtime so edits invalidate."""
+    return pd.read_csv(path, engine="pyarrow", dtype_backend="pyarrow")
+
+
+def _agg_rain_loop(region_codes, dates_ns, mm, n_regions, cutoff_ns):
+    """Latest reading and in-window sum/count per region, in one pass over the rows."""
+    latest_ns = np.full(n_regions, _INT64_MIN, dtype=np.int64)
+    latest_mm = np.full(n_regions, np.nan)
+    sum_7d = np.zeros(n_regions)
+    count_7d = np.zeros(n_regions, dtype=np.int64)
+    for i in range(region_codes.shape[0]):
+        r = region_codes[i]
+        if r < 0:
+            continue
+        d = dates_ns[i]
+        # strict > keeps the first row on ties, like idxmax
+        if d > latest_ns[r]:
+            latest_ns[r] = d
+            latest_mm[r] = mm[i]
+        if d >= cutoff_ns and not np.isnan(mm[i]):
+            sum_7d[r] += mm[i]
+            count_7d[r] += 1
+    return latest_mm, sum_7d, count_7d
+
+
+# Serial on purpose: rows of one region update the same slots, so a prange
+# loop would race. cache=True keeps the compiled kernel across processes.
+_agg_rain_kernel = njit(cache=True)(_agg_rain_loop) if njit is not None else None
+
+
+def _agg_rain_numba(valid: pd.DataFrame, cutoff: pd.Timestamp) -> pd.DataFrame:
+    """Numba equivalent of the rainfall groupby for large inputs (rows must have a date)."""
+    codes, regions = pd.factorize(valid["region"], sort=True)
+    latest_mm, sum_7d, count_7d = _agg_rain_kernel(
+        codes.astype(np.int32),
+        valid["date"].to_numpy(dtype="datetime64[ns]").view(np.int64),
+        pd.to_numeric(valid["rainfall_mm"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan),
+        len(regions),
+        cutoff.value,
+    )
+    avg_7d = np.full(len(regions), np.nan)
+    np.divide(sum_7d, count_7d, out=avg_7d, where=count_7d > 0)
+    return pd.DataFrame({"latest_mm": latest_mm, "avg_7d": avg_7d},
+                        index=pd.Index(regions, name="region_name"))
+
+
+def _column_values(series: pd.Series) -> list:
+    """Column as a list of native Python values, with missing entries as None."""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
 def create_mv_table(db: DatabaseConnection) -> bool:
     """Create the materialized view table if it doesn't exist."""
     ddl = f"""
@@ -80,17 +167,15 @@ def create_mv_table(db: DatabaseConnection) -> bool:
 def refresh_mv_from_db(db: DatabaseConnection) -> bool:
     """Refresh the MV by recomputing from base tables via SQL only.
 
-    This uses a TRUNCATE + INSERT pattern to simulate a materialized view.
+    Rows are upserted in place (INSERT ... SELECT ... ON DUPLICATE KEY UPDATE)
+    so concurrent readers never see an empty table, then rows for regions
+    that no longer exist are deleted.
     """
     # Ensure table exists
     if not create_mv_table(db):
         return False
 
-    # Clear existing data
-    if not db.execute_update(f"TRUNCATE TABLE {MV_TABLE_NAME}"):
-        return False
-
-    # Insert recomputed rows
+    # Upsert recomputed rows
     insert_sql = f"""
         INSERT INTO {MV_TABLE_NAME} (
             region_name, population, risk_level,
@@ -155,12 +240,14 @@ def refresh_mv_from_db(db: DatabaseConnection) -> bool:
                    x.latest_mm,
                    y.avg_7d
             FROM (
-                SELECT rd.region AS region_name,
-                       SUBSTRING_INDEX(
-                           GROUP_CONCAT(rd.rainfall_mm ORDER BY rd.date DESC), ',', 1
-                       ) + 0.0 AS latest_mm
-                FROM rainfall_data rd
-                GROUP BY rd.region
+                SELECT ranked.region AS region_name,
+                       ranked.rainfall_mm AS latest_mm
+                FROM (
+                    SELECT rd.region, rd.rainfall_mm,
+                           ROW_NUMBER() OVER (PARTITION BY rd.region ORDER BY rd.date DESC) AS rn
+                    FROM rainfall_data rd
+                ) ranked
+                WHERE ranked.rn = 1
             ) x
             LEFT JOIN (
                 SELECT rd.region AS region_name,
@@ -170,31 +257,27 @@ def refresh_mv_from_db(db: DatabaseConnection) -> bool:
                 GROUP BY rd.region
             ) y ON x.region_name = y.region_name
         ) rain ON rain.region_name = ar.region_name
+        {MV_UPSERT_CLAUSE}
     """
 
-    return db.execute_update(insert_sql)
+    if not db.execute_update(insert_sql):
+        return False
 
+    # Drop rows for regions removed from affected_regions
+    return db.execute_update(f"""
+        DELETE FROM {MV_TABLE_NAME}
+        WHERE region_name NOT IN (SELECT region_name FROM affected_regions)
+    """)
 
-def refresh_mv_from_csv(
-    csv_dir: str = os.path.join(os.path.dirname(os.path.dirname(__file__)), "csv_sheets"),
-    db: Optional[DatabaseConnection] = None,
-    output_csv_path: Optional[str] = None,
-) -> pd.DataFrame:
-    """Build the MV dataframe from CSVs. Optionally write to DB and/or to a CSV.
 
-    Args:
-        csv_dir: directory containing rainfall_data.csv, affected_regions.csv, alerts.csv, resources.csv, distribution_log.csv
-        db: if provided, will upsert rows into mv_region_dashboard
-        output_csv_path: if provided, writes the MV to this CSV path
-    Returns:
-        The computed pandas DataFrame
-    """
+def _combine_csv_pandas(csv_dir: str) -> pd.DataFrame:
+    """Aggregate the CSVs with pandas and join them onto affected_regions."""
     # Load CSVs
     def _read(name):
         path = os.path.join(csv_dir, name)
         if not os.path.exists(path):
             return pd.DataFrame()
-        return pd.read_csv(path)
+        return _read_csv_cached(path, os.path.getmtime(path))
 
     df_regions = _read("affected_regions.csv")
     df_alerts = _read("alerts.csv")
@@ -216,59 +299,215 @@ def refresh_mv_from_csv(
             if c not in df.columns:
                 df[c] = pd.NA
 
+    # Align join keys so the joins hash native ints/strings rather than
+    # falling back to object keys (e.g. when a column was filled with pd.NA)
+    for df, col in ((df_regions, "region_id"), (df_dist, "region_id")):
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+    for df, col in (
+        (df_regions, "region_name"),
+        (df_alerts, "region"),
+        (df_resources, "location"),
+        (df_rain, "region"),
+    ):
+        df[col] = df[col].astype("string").str.strip()
+
     # Alerts aggregation
     if not df_alerts.empty:
-        # ensure date parsing
-        df_alerts["expiry_date"] = pd.to_datetime(df_alerts["expiry_date"], errors="coerce").dt.date
-        today = pd.Timestamp("today").date()
+        # ensure date parsing; stay datetime64 so the comparison is vectorized
+        df_alerts["expiry_date"] = pd.to_datetime(df_alerts["expiry_date"], errors="coerce")
+        today = pd.Timestamp.today().normalize()
         df_alerts_active = df_alerts[df_alerts["expiry_date"] >= today].copy()
-        sev_rank = {"Low": 1, "Moderate": 2, "High": 3, "Critical": 4}
-        df_alerts_active["sev_rank"] = df_alerts_active["severity"].map(sev_rank).fillna(0).astype(int)
-        ag_alerts = df_alerts_active.groupby("region").agg(
-            alerts_active=("region", "count"),
-            max_sev_rank=("sev_rank", "max"),
-        ).reset_index().rename(columns={"region": "region_name"})
+        # Ordered categories make the code the rank (Low=1 .. Critical=4);
+        # unknown severities are nulled first (code -1) and clipped to 0
+        severity = df_alerts_active["severity"]
+        sev_cat = pd.Categorical(severity.where(severity.isin(SEVERITY_ORDER)),
+                                 categories=SEVERITY_ORDER, ordered=True)
+        df_alerts_active["sev_rank"] = sev_cat.codes.clip(min=0).astype("int8")
+        # size() reads the group sizes without touching a column; the join
+        # below is on the index, so the keys needn't be sorted
+        g = df_alerts_active.groupby("region", sort=False)
+        ag_alerts = pd.DataFrame({
+            "alerts_active": g.size(),
+            "max_sev_rank": g["sev_rank"].max(),
+        }).rename_axis("region_name")
     else:
-        ag_alerts = pd.DataFrame(columns=["region_name", "alerts_active", "max_sev_rank"]) 
+        ag_alerts = pd.DataFrame(columns=["alerts_active", "max_sev_rank"],
+                                 index=pd.Index([], name="region_name"))
 
     # Resources aggregation
     if not df_resources.empty:
-        ag_res = df_resources.groupby("location", dropna=False)["quantity_available"].sum().reset_index()
-        ag_res = ag_res.rename(columns={"location": "region_name", "quantity_available": "total_qty"})
+        ag_res = df_resources.groupby("location", dropna=False, sort=False)["quantity_available"].sum() \
+                             .rename("total_qty").rename_axis("region_name")
     else:
-        ag_res = pd.DataFrame(columns=["region_name", "total_qty"]) 
+        ag_res = pd.Series(name="total_qty", index=pd.Index([], name="region_name"), dtype="float64")
 
     # Distribution aggregation (last 7 days)
     if not df_dist.empty:
         df_dist["date_distributed"] = pd.to_datetime(df_dist["date_distributed"], errors="coerce")
         cutoff = pd.Timestamp.today().normalize() - pd.Timedelta(days=7)
         df_dist7 = df_dist[df_dist["date_distributed"] >= cutoff]
-        ag_dist = df_dist7.groupby("region_id")["quantity_sent"].sum().reset_index().rename(columns={"quantity_sent": "qty_last_7d"})
+        ag_dist = df_dist7.groupby("region_id", sort=False)["quantity_sent"].sum()
     else:
-        ag_dist = pd.DataFrame(columns=["region_id", "qty_last_7d"]) 
+        ag_dist = pd.Series(index=pd.Index([], name="region_id"), dtype="float64")
 
     # Rainfall aggregation: latest and 7d avg by region
     if not df_rain.empty:
         df_rain["date"] = pd.to_datetime(df_rain["date"], errors="coerce")
-        latest = df_rain.sort_values(["region", "date"], ascending=[True, False]).drop_duplicates(["region"]) \
-                        [["region", "rainfall_mm"]].rename(columns={"region": "region_name", "rainfall_mm": "latest_mm"})
+        valid = df_rain.dropna(subset=["date"])
         cutoff = pd.Timestamp.today().normalize() - pd.Timedelta(days=7)
-        rain7 = df_rain[df_rain["date"] >= cutoff]
-        ag_rain7 = rain7.groupby("region")["rainfall_mm"].mean().reset_index().rename(columns={"region": "region_name", "rainfall_mm": "avg_7d"})
-        rain = latest.merge(ag_rain7, on="region_name", how="left")
+        if _agg_rain_kernel is not None and len(valid) >= NUMBA_MIN_ROWS:
+            rain = _agg_rain_numba(valid, cutoff)
+        else:
+            # Latest reading and 7-day average in one groupby pass; readings
+            # outside the window are masked to NaN so mean() skips them
+            valid = valid.assign(mm_7d=valid["rainfall_mm"].where(valid["date"] >= cutoff))
+            rain = valid.groupby("region").agg(
+                latest_idx=("date", "idxmax"),
+                avg_7d=("mm_7d", "mean"),
+            )
+            rain["latest_mm"] = valid.loc[rain["latest_idx"], "rainfall_mm"].to_numpy()
+            rain = rain.rename_axis("region_name")[["latest_mm", "avg_7d"]]
     else:
-        rain = pd.DataFrame(columns=["region_name", "latest_mm", "avg_7d"]) 
+        rain = pd.DataFrame(columns=["latest_mm", "avg_7d"],
+                            index=pd.Index([], name="region_name"))
+
+    # Combine with regions (left anchor): one multi-frame join on region_name
+    # instead of a merge (and a full reallocation) per aggregate. The
+    # aggregates keep their groupby index, so nothing is reset and re-set.
+    mv = df_regions[["region_id", "region_name", "population", "risk_level"]].set_index("region_name")
+    mv = mv.join([ag_alerts, ag_res, rain], how="left")
+    # Distributions are keyed on region_id; map the single column across
+    mv.insert(mv.columns.get_loc("latest_mm"), "qty_last_7d", mv["region_id"].map(ag_dist))
+    mv = mv.reset_index()
+    mv.insert(1, "region_name", mv.pop("region_name"))
+
+    return mv
 
-    # Combine with regions (left anchor)
-    mv = df_regions[["region_id", "region_name", "population", "risk_level"]].copy()
-    mv = mv.merge(ag_alerts, on="region_name", how="left")
-    mv = mv.merge(ag_res, on="region_name", how="left")
-    mv = mv.merge(ag_dist, on="region_id", how="left")
-    mv = mv.merge(rain, on="region_name", how="left")
 
-    # Map sev rank to label
-    rank_to_label = {4: "Critical", 3: "High", 2: "Moderate", 1: "Low"}
-    mv["highest_active_severity"] = mv["max_sev_rank"].map(rank_to_label)
+def _combine_csv_polars(csv_dir: str) -> Optional[pd.DataFrame]:
+    """Polars lazy-plan equivalent of _combine_csv_pandas.
+
+    Returns None when a CSV or an expected column is missing, so the caller
+    can fall back to the pandas path (which fills the gaps with NA).
+    """
+    required = {
+        "affected_regions.csv": ["region_id", "region_name", "population", "risk_level"],
+        "alerts.csv": ["region", "severity", "expiry_date"],
+        "resources.csv": ["location", "quantity_available"],
+        "rainfall_data.csv": ["region", "date", "rainfall_mm"],
+        "distribution_log.csv": ["region_id", "quantity_sent", "date_distributed"],
+    }
+    frames = {}
+    for name, cols in required.items():
+        path = os.path.join(csv_dir, name)
+        if not os.path.exists(path):
+            return None
+        lf = pl.scan_csv(path)
+        if not set(cols).issubset(lf.collect_schema().names()):
+            return None
+        frames[name] = lf.select(cols)
+
+    today = datetime.combine(datetime.today().date(), datetime.min.time())
+    cutoff = today - timedelta(days=7)
+
+    def _key(col: str) -> pl.Expr:
+        return pl.col(col).cast(pl.Utf8).str.strip_chars()
+
+    def _date(col: str) -> pl.Expr:
+        return pl.col(col).cast(pl.Utf8).str.to_datetime(strict=False)
+
+    regions = frames["affected_regions.csv"].with_columns(
+        pl.col("region_id").cast(pl.Int64, strict=False),
+        _key("region_name"),
+    )
+    alerts = (
+        frames["alerts.csv"]
+        .with_columns(_key("region"), _date("expiry_date"))
+        .filter(pl.col("expiry_date") >= today)
+        .with_columns(
+            pl.col("severity").cast(pl.Utf8)
+            .replace_strict({s: i for i, s in enumerate(SEVERITY_ORDER) if i},
+                            default=0, return_dtype=pl.Int8)
+            .fill_null(0)
+            .alias("sev_rank")
+        )
+        .group_by("region")
+        .agg(pl.len().alias("alerts_active"), pl.col("sev_rank").max().alias("max_sev_rank"))
+        .rename({"region": "region_name"})
+    )
+    res = (
+        frames["resources.csv"]
+        .with_columns(_key("location"))
+        .group_by("location")
+        .agg(pl.col("quantity_available").sum().alias("total_qty"))
+        .rename({"location": "region_name"})
+    )
+    dist = (
+        frames["distribution_log.csv"]
+        .with_columns(pl.col("region_id").cast(pl.Int64, strict=False), _date("date_distributed"))
+        .filter(pl.col("date_distributed") >= cutoff)
+        .group_by("region_id")
+        .agg(pl.col("quantity_sent").sum().alias("qty_last_7d"))
+    )
+    # arg_max() picks the first row on ties, like idxmax in the pandas path
+    rain = (
+        frames["rainfall_data.csv"]
+        .with_columns(_key("region"), _date("date"),
+                      pl.col("rainfall_mm").cast(pl.Float64, strict=False))
+        .drop_nulls("date")
+        .group_by("region")
+        .agg(
+            pl.col("rainfall_mm").get(pl.col("date").arg_max()).alias("latest_mm"),
+            pl.col("rainfall_mm").filter(pl.col("date") >= cutoff).mean().alias("avg_7d"),
+        )
+        .rename({"region": "region_name"})
+    )
+
+    mv = (
+        regions
+        .join(alerts, on="region_name", how="left")
+        .join(res, on="region_name", how="left")
+        .join(dist, on="region_id", how="left")
+        .join(rain, on="region_name", how="left")
+        .select([
+            "region_id", "region_name", "population", "risk_level",
+            "alerts_active", "max_sev_rank", "total_qty", "qty_last_7d",
+            "latest_mm", "avg_7d",
+        ])
+        .collect()
+    )
+    # Arrow-backed dtypes, matching what the pandas path reads
+    return mv.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def refresh_mv_from_csv(
+    csv_dir: str = os.path.join(os.path.dirname(os.path.dirname(__file__)), "csv_sheets"),
+    db: Optional[DatabaseConnection] = None,
+    output_csv_path: Optional[str] = None,
+    engine: str = "pandas",
+) -> pd.DataFrame:
+    """Build the MV dataframe from CSVs. Optionally write to DB and/or to a CSV.
+
+    Args:
+        csv_dir: directory containing rainfall_data.csv, affected_regions.csv, alerts.csv, resources.csv, distribution_log.csv
+        db: if provided, will upsert rows into mv_region_dashboard and
+            delete rows for regions missing from the CSVs
+        output_csv_path: if provided, writes the MV to this CSV path
+        engine: "pandas", or "polars" to aggregate with a single Polars lazy
+            plan (falls back to pandas if polars isn't installed or a CSV or
+            column is missing)
+    Returns:
+        The computed pandas DataFrame
+    """
+    mv = None
+    if engine == "polars" and pl is not None:
+        mv = _combine_csv_polars(csv_dir)
+    if mv is None:
+        mv = _combine_csv_pandas(csv_dir)
+
+    # Map sev rank to label by indexing into the labels array (rank 0 -> None)
+    ranks = pd.to_numeric(mv["max_sev_rank"]).fillna(0).astype(int).to_numpy()
+    mv["highest_active_severity"] = SEVERITY_LABELS[ranks]
 
     # Final column selection and defaults
     mv = mv.rename(columns={
@@ -294,37 +533,43 @@ def refresh_mv_from_csv(
     # Optionally upsert into DB
     if db is not None:
         create_mv_table(db)
-        db.execute_update(f"TRUNCATE TABLE {MV_TABLE_NAME}")
 
-        # Prepare batch insert
-        insert_stmt = f"""
+        # Prepare batch upsert
+        insert_prefix = f"""
             INSERT INTO {MV_TABLE_NAME}
             (region_name, population, risk_level, active_alerts_count, highest_active_severity,
              total_resources_available, distributions_last_7d, latest_rainfall_mm, avg_rainfall_7d, last_refreshed)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-        """
-        rows: List[Tuple] = []
-        for _, r in mv.iterrows():
-            rows.append((
-                r.get("region_name"),
-                None if pd.isna(r.get("population")) else int(r.get("population")),
-                None if pd.isna(r.get("risk_level")) else str(r.get("risk_level")),
-                int(r.get("active_alerts_count", 0)),
-                None if pd.isna(r.get("highest_active_severity")) else str(r.get("highest_active_severity")),
-                int(r.get("total_resources_available", 0)),
-                int(r.get("distributions_last_7d", 0)),
-                None if pd.isna(r.get("latest_rainfall_mm")) else float(r.get("latest_rainfall_mm")),
-                None if pd.isna(r.get("avg_rainfall_7d")) else float(r.get("avg_rainfall_7d")),
-            ))
-
-        # Use the underlying cursor for executemany for performance
-        try:
-            db.cursor.executemany(insert_stmt, rows)
-            db.connection.commit()
-        except Exception as e:
-            # Fallback row-by-row if needed
+            VALUES """
+        row_placeholder = "(%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())"
+        # Coerce whole columns at once; NA -> None and native Python scalars
+        # so the connector can bind them
+        rows: List[Tuple] = list(zip(
+            mv["region_name"].tolist(),
+            _column_values(pd.to_numeric(mv["population"], errors="coerce").astype("Int64")),
+            _column_values(mv["risk_level"].astype("string")),
+            mv["active_alerts_count"].tolist(),
+            _column_values(mv["highest_active_severity"].astype("string")),
+            mv["total_resources_available"].tolist(),
+            mv["distributions_last_7d"].tolist(),
+            _column_values(pd.to_numeric(mv["latest_rainfall_mm"], errors="coerce")),
+            _column_values(pd.to_numeric(mv["avg_rainfall_7d"], errors="coerce")),
+        ))
+
+        # Multi-row upserts with a single commit; fall back row-by-row on failure
+        if db.insert_many(insert_prefix, row_placeholder, rows, suffix=MV_UPSERT_CLAUSE) < 0:
             for row in rows:
-                db.execute_update(insert_stmt, row)
+                db.execute_update(insert_prefix + row_placeholder + MV_UPSERT_CLAUSE, row)
+
+        # Drop rows for regions that are no longer in the CSVs
+        regions = mv["region_name"].tolist()
+        if regions:
+            db.execute_update(
+                f"DELETE FROM {MV_TABLE_NAME} WHERE region_name NOT IN "
+                f"({', '.join(['%s'] * len(regions))})",
+                tuple(regions),
+            )
+        else:
+            db.execute_update(f"DELETE FROM {MV_TABLE_NAME}")
 
     return mv
 
@@ -337,6 +582,7 @@ if __name__ == "__main__":
     parser.add_argument("--from", dest="source", choices=["db", "csv"], default="db")
     parser.add_argument("--csv-dir", dest="csv_dir", default=os.path.join(os.path.dirname(os.path.dirname(__file__)), "csv_sheets"))
     parser.add_argument("--output-csv", dest="output_csv", default=None)
+    parser.add_argument("--engine", choices=["pandas", "polars"], default="pandas")
     parser.add_argument("--host", default="localhost")
     parser.add_argument("--database", default="cloudburst_management")
     parser.add_argument("--user", default="root")
@@ -352,5 +598,5 @@ if __name__ == "__main__":
             print("DB connection failed")
     else:
         # CSV path; optionally write to CSV and/or DB if credentials provided
-        df = refresh_mv_from_csv(csv_dir=args.csv_dir, output_csv_path=args.output_csv)
+        df = refresh_mv_from_csv(csv_dir=args.csv_dir, output_csv_path=args.output_csv, engine=args.engine)
         print(f"Built MV from CSV with {len(df)} rows")
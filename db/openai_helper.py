@@ -3,12 +3,246 @@ OpenAI Integration Module
 Handles AI-powered natural language to SQL conversion and query responses
 """
 
-import openai
+import asyncio
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+import httpx
+import numpy as np
 import streamlit as st
-from typing import Optional, Dict, Any
+from openai import OpenAI, APIError, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+from typing import Optional, Dict, Any, Tuple, Callable, Hashable
 import pandas as pd
 import json
 
+try:
+    import sqlglot
+    from sqlglot import exp
+except ImportError:  # optional; validate_sql falls back to a keyword scan
+    sqlglot = None
+
+try:
+    import h2  # noqa: F401 (httpx's HTTP/2 support)
+    HTTP2 = True
+except ImportError:  # optional; the clients then speak HTTP/1.1
+    HTTP2 = False
+
+try:
+    import tiktoken
+except ImportError:  # optional; prompts are then capped by character count
+    tiktoken = None
+
+
+# Completions kept per assistant for exact-repeat requests (LRU)
+RESPONSE_CACHE_SIZE = 256
+
+# Transient failures (rate limits, timeouts, 5xx) are retried with
+# exponential backoff and full jitter
+MAX_ATTEMPTS = 5
+RETRY_MIN_WAIT = 1.0
+RETRY_MAX_WAIT = 20.0
+_RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+# Idle API connections are kept open this long, so a burst of calls (or the
+# next question) reuses the TLS session instead of handshaking again
+KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 60.0
+
+# Bounds on the result summary sent to explain_results
+SUMMARY_MAX_COLUMNS = 8
+SUMMARY_MAX_SAMPLE_CHARS = 1500
+
+# Token cap on the variable part of a prompt (question, SQL, result sample);
+# without tiktoken, CHARS_PER_TOKEN characters stand in for one token
+MAX_PROMPT_TOKENS = 3000
+CHARS_PER_TOKEN = 4
+
+# Smaller, lower-latency model for result explanations and follow-ups
+FAST_MODEL = "gpt-4o-mini"
+
+# Generated SQL reused for paraphrased questions (cosine similarity of the
+# question embeddings), at most SEMANTIC_CACHE_SIZE entries (LRU)
+EMBED_MODEL = "text-embedding-3-small"
+SEMANTIC_CACHE_SIZE = 1000
+SEMANTIC_CACHE_THRESHOLD = 0.95
+
+
+# Statements the keyword-scan fallback of validate_sql rejects (whole words)
+_DANGEROUS_SQL = re.compile(r'\b(drop|delete|truncate|alter|create|update|insert)\b')
+
+# Start of the "sql" string value in a (possibly incomplete) JSON response
+_SQL_VALUE_START = re.compile(r'"sql"\s*:\s*"')
+
+
+def _http_limits() -> httpx.Limits:
+    """Connection pool limits shared by the API clients"""
+    return httpx.Limits(
+        max_keepalive_connections=KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY
+    )
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    """tiktoken encoding for a model, or None if tiktoken is unavailable"""
+    if tiktoken is None:
+        return None
+    try:
+        name = tiktoken.encoding_name_for_model(model)
+    except KeyError:
+        # Model name tiktoken doesn't know yet: use the current encoding
+        name = "o200k_base"
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception:
+        # Encoding files could not be fetched (e.g. offline)
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    """
+    Number of tokens text takes up for a model
+    
+    Args:
+        text: Prompt text
+        model: Model the text is sent to
+        
+    Returns:
+        Exact count with tiktoken, otherwise a CHARS_PER_TOKEN estimate
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _trim_prompt(text: str, model: str, max_tokens: int = MAX_PROMPT_TOKENS) -> str:
+    """
+    Cut text to at most max_tokens tokens of the model's encoding
+    
+    Args:
+        text: Prompt text
+        model: Model the prompt is sent to
+        max_tokens: Token limit
+        
+    Returns:
+        The text, truncated (deterministically) if it was over the limit
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def _partial_sql(buffer: str) -> Optional[str]:
+    """
+    SQL decoded so far from a streamed JSON response
+    
+    Args:
+        buffer: Response text received so far
+        
+    Returns:
+        The (possibly incomplete) "sql" value, or None if it hasn't started
+    """
+    match = _SQL_VALUE_START.search(buffer)
+    if match is None:
+        return None
+    chars = []
+    escaped = False
+    for ch in buffer[match.end():]:
+        if escaped:
+            chars.append(ch)
+            escaped = False
+        elif ch == '\\':
+            chars.append(ch)
+            escaped = True
+        elif ch == '"':
+            break
+        else:
+            chars.append(ch)
+    if escaped:
+        chars.pop()
+    try:
+        return json.loads('"' + "".join(chars) + '"')
+    except json.JSONDecodeError:
+        # cut inside a \uXXXX escape; show it on the next chunk
+        return None
+
+
+def _sql_progress(on_update: Callable[[str], Any]) -> Callable[[str], None]:
+    """Stream callback that passes on the partial SQL whenever it changes"""
+    shown = None
+    
+    def on_delta(buffer: str):
+        nonlocal shown
+        sql = _partial_sql(buffer)
+        if sql and sql != shown:
+            shown = sql
+            on_update(sql)
+    
+    return on_delta
+
+
+class SemanticCache:
+    """
+    Question embeddings and the results generated for them
+    
+    An entry can carry a tag (any hashable, e.g. the entities a question
+    names); lookups only match entries with an equal tag, so two close
+    paraphrases about different regions or dates never share a result.
+    """
+    
+    def __init__(self, size: int = SEMANTIC_CACHE_SIZE, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 ttl: Optional[float] = None):
+        self.size = size
+        self.threshold = threshold
+        self.ttl = ttl  # seconds an entry stays valid; None keeps it until evicted
+        self._vectors: Optional[np.ndarray] = None  # (size, dim), allocated on first add
+        self._results: list = []
+        self._last_used = np.zeros(size, dtype=np.int64)
+        self._added = np.zeros(size, dtype=np.float64)
+        self._tags = np.zeros(size, dtype=np.int64)  # hash of each entry's tag
+        self._tick = 0
+    
+    def lookup(self, vector: np.ndarray, tag: Hashable = None) -> Optional[Dict[str, Any]]:
+        """Result stored for the most similar question with the same tag, if it clears the threshold"""
+        if not self._results:
+            return None
+        sims = self._vectors[:len(self._results)] @ vector
+        sims[self._tags[:len(self._results)] != hash(tag)] = -np.inf
+        if self.ttl is not None:
+            expired = self._added[:len(self._results)] < time.monotonic() - self.ttl
+            sims[expired] = -np.inf
+        best = int(np.argmax(sims))
+        if sims[best] < self.threshold:
+            return None
+        self._tick += 1
+        self._last_used[best] = self._tick
+        return dict(self._results[best])
+    
+    def add(self, vector: np.ndarray, result: Dict[str, Any], tag: Hashable = None):
+        """Store a result, replacing the least recently used one when full"""
+        if self._vectors is None:
+            self._vectors = np.zeros((self.size, vector.shape[0]), dtype=np.float32)
+        if len(self._results) < self.size:
+            slot = len(self._results)
+            self._results.append(result)
+        else:
+            slot = int(np.argmin(self._last_used))
+            self._results[slot] = result
+        self._vectors[slot] = vector
+        self._added[slot] = time.monotonic()
+        self._tags[slot] = hash(tag)
+        self._tick += 1
+        self._last_used[slot] = self._tick
+
 
 class OpenAIAssistant:
     """AI Assistant for natural language database queries"""
@@ -23,7 +257,20 @@ class OpenAIAssistant:
         """
         self.api_key = api_key
         self.model = model
-        openai.api_key = api_key
+        # Explanations and follow-up suggestions don't need the SQL model
+        self.fast_model = FAST_MODEL
+        # Retries are handled by _request, so the client's own are turned off
+        self.client = OpenAI(
+            api_key=api_key,
+            max_retries=0,
+            http_client=httpx.Client(http2=HTTP2, limits=_http_limits())
+        )
+        # request key -> completion text; describe_results fills it from two
+        # threads at once
+        self._responses: "OrderedDict[str, str]" = OrderedDict()
+        self._responses_lock = threading.Lock()
+        self.embed_model = EMBED_MODEL
+        self._sql_cache = SemanticCache()
         
         # Database schema for context
         self.schema = """
@@ -73,24 +320,14 @@ class OpenAIAssistant:
            - date_issued (DATE)
            - expiry_date (DATE)
         """
-    
-    def generate_sql_query(self, user_question: str) -> Dict[str, Any]:
-        """
-        Convert natural language question to SQL query
         
-        Args:
-            user_question: User's natural language question
-            
-        Returns:
-            Dictionary with SQL query and explanation
-        """
-        try:
-            prompt = f"""You are a SQL expert. Convert the following natural language question into a SQL query for a MySQL database.
+        # Everything but the question goes in the system message, built once:
+        # the user turn is just the question, and every request shares the
+        # same leading text for OpenAI's prompt prefix cache
+        self._sql_system_prompt = f"""You are a SQL expert that converts natural language questions into SQL queries for a MySQL database. Always respond with valid JSON.
 
 Database Schema:
-{self.schema}
-
-User Question: {user_question}
+{self.schema}""" + """
 
 Rules:
 1. Generate ONLY valid MySQL queries
@@ -100,45 +337,167 @@ Rules:
 5. Return data in a user-friendly format
 
 Respond with JSON in this exact format:
-{{
+{
     "sql": "SELECT ... FROM ... WHERE ...",
     "explanation": "Brief explanation of what the query does",
     "visualization_type": "table|chart|metric",
-    "chart_config": {{"type": "bar|line|pie", "x": "column", "y": "column"}}
-}}
+    "chart_config": {"type": "bar|line|pie", "x": "column", "y": "column"},
+    "follow_up_questions": ["Up to 3 concise, relevant follow-up questions"]
+}
 
 Only return the JSON, nothing else."""
-
-            response = openai.chat.completions.create(
-                model=self.model,
+    
+    def _request(self, create: Callable, **options):
+        """
+        Make an API request, retrying transient failures
+        
+        Args:
+            create: Client method to call (e.g. self.client.chat.completions.create)
+            options: Keyword arguments for the call
+            
+        Returns:
+            The API response
+        """
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                return create(**options)
+            except _RETRYABLE_ERRORS:
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+            ceiling = min(RETRY_MAX_WAIT, RETRY_MIN_WAIT * 2 ** attempt)
+            time.sleep(random.uniform(RETRY_MIN_WAIT, ceiling))
+    
+    def _cached_complete(self, messages: list, temperature: float, max_tokens: int,
+                               model: Optional[str] = None,
+                               response_format: Optional[Dict[str, str]] = None,
+                               on_delta: Optional[Callable[[str], Any]] = None) -> str:
+        """
+        Chat completion text, reusing the answer to an identical earlier request
+        
+        Args:
+            messages: Chat messages
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+            model: Model to use (defaults to self.model)
+            response_format: Response format (e.g. {"type": "json_object"})
+            on_delta: If given, the completion is streamed and this is called
+                with the text received so far after each chunk
+            
+        Returns:
+            Completion message content
+        """
+        options = {
+            'model': model or self.model,
+            'messages': messages,
+            'temperature': temperature,
+            'max_tokens': max_tokens
+        }
+        if response_format is not None:
+            options['response_format'] = response_format
+        
+        key = hashlib.blake2b(
+            json.dumps(options, sort_keys=True).encode(),
+            digest_size=16
+        ).hexdigest()
+        with self._responses_lock:
+            content = self._responses.get(key)
+            if content is not None:
+                self._responses.move_to_end(key)
+                return content
+        
+        if on_delta is None:
+            response = self._request(self.client.chat.completions.create, **options)
+            content = response.choices[0].message.content
+        else:
+            stream = self._request(self.client.chat.completions.create, **options, stream=True)
+            parts = []
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    on_delta("".join(parts))
+            content = "".join(parts) if parts else None
+        if content is not None:
+            with self._responses_lock:
+                self._responses[key] = content
+                if len(self._responses) > RESPONSE_CACHE_SIZE:
+                    self._responses.popitem(last=False)
+        return content
+    
+    def _embed_question(self, user_question: str) -> Optional[np.ndarray]:
+        """
+        Unit-length embedding of a question, for the semantic SQL cache
+        
+        Args:
+            user_question: User's natural language question
+            
+        Returns:
+            float32 vector, or None if the embedding request failed
+        """
+        try:
+            response = self._request(
+                self.client.embeddings.create,
+                model=self.embed_model,
+                input=user_question.strip()
+            )
+        except Exception:
+            return None
+        vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+    
+    def generate_sql_query(self, user_question: str,
+                           on_update: Optional[Callable[[str], Any]] = None) -> Dict[str, Any]:
+        """
+        Convert natural language question to SQL query
+        
+        Args:
+            user_question: User's natural language question
+            on_update: If given, the response is streamed and this is called
+                with the partial SQL each time it grows
+            
+        Returns:
+            Dictionary with SQL query and explanation
+        """
+        # A paraphrase of an earlier question reuses its SQL (an embedding
+        # request is far cheaper than a completion)
+        embedding = self._embed_question(user_question)
+        if embedding is not None:
+            cached = self._sql_cache.lookup(embedding)
+            if cached is not None:
+                return cached
+        
+        on_delta = _sql_progress(on_update) if on_update is not None else None
+        
+        try:
+            content = self._cached_complete(
                 messages=[
-                    {"role": "system", "content": "You are a SQL expert that converts natural language to SQL queries. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
+                    {"role": "system", "content": self._sql_system_prompt},
+                    {"role": "user", "content": _trim_prompt(user_question, self.model)}
                 ],
                 temperature=0.3,
-                max_tokens=1000
+                max_tokens=1000,
+                # JSON mode: the reply is always a bare, parseable JSON object
+                response_format={"type": "json_object"},
+                on_delta=on_delta
             )
             
             # Parse response
-            content = response.choices[0].message.content.strip()
-            
-            # Remove markdown code blocks if present
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            
-            result = json.loads(content.strip())
+            result = json.loads(content)
             
-            return {
+            response = {
                 'success': True,
                 'sql': result.get('sql', ''),
                 'explanation': result.get('explanation', ''),
                 'visualization_type': result.get('visualization_type', 'table'),
-                'chart_config': result.get('chart_config', {})
+                'chart_config': result.get('chart_config', {}),
+                'follow_up_questions': [
+                    q.strip() for q in result.get('follow_up_questions') or [] if isinstance(q, str) and q.strip()
+                ][:3]
             }
+            if embedding is not None:
+                self._sql_cache.add(embedding, response)
+            return response
             
         except json.JSONDecodeError as e:
             return {
@@ -165,37 +524,45 @@ Only return the JSON, nothing else."""
             Natural language explanation
         """
         try:
-            # Prepare data summary
+            # Prepare data summary; the model only needs a flavour of the data,
+            # so wide frames are cut to a few columns and a bounded sample
+            columns = df.columns[:SUMMARY_MAX_COLUMNS].tolist()
+            sample = df[columns].head(3).to_dict('records') if not df.empty else []
+            column_list = ', '.join(map(str, columns))
+            if len(df.columns) > SUMMARY_MAX_COLUMNS:
+                column_list += f" (+{len(df.columns) - SUMMARY_MAX_COLUMNS} more)"
             data_summary = {
                 'rows': len(df),
-                'columns': df.columns.tolist(),
-                'sample_data': df.head(3).to_dict('records') if not df.empty else []
+                'columns': column_list,
+                'sample_data': json.dumps(sample, default=str)[:SUMMARY_MAX_SAMPLE_CHARS]
             }
             
-            prompt = f"""Given this database query and results, provide a clear, concise explanation for the user.
-
-User Question: {user_question}
+            context = _trim_prompt(f"""User Question: {user_question}
 
 SQL Query: {query}
 
 Results Summary:
 - Number of rows: {data_summary['rows']}
-- Columns: {', '.join(data_summary['columns'])}
-- Sample data: {json.dumps(data_summary['sample_data'], default=str)}
+- Columns: {data_summary['columns']}
+- Sample data: {data_summary['sample_data']}""", self.fast_model)
+            
+            prompt = f"""Given this database query and results, provide a clear, concise explanation for the user.
+
+{context}
 
 Provide a brief, user-friendly explanation of the results in 2-3 sentences. Focus on key insights and patterns."""
 
-            response = openai.chat.completions.create(
-                model=self.model,
+            content = self._cached_complete(
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that explains database query results in simple terms."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.5,
+                model=self.fast_model,
                 max_tokens=300
             )
             
-            return response.choices[0].message.content.strip()
+            return content.strip()
             
         except Exception as e:
             return f"Results retrieved successfully with {len(df)} records."
@@ -214,33 +581,61 @@ Provide a brief, user-friendly explanation of the results in 2-3 sentences. Focu
         try:
             prompt = f"""Based on this database query about disaster management, suggest 3 relevant follow-up questions.
 
-Original Question: {user_question}
+Original Question: {_trim_prompt(user_question, self.fast_model)}
 Number of Results: {len(results_df)}
 
-Suggest 3 specific, actionable follow-up questions the user might want to ask. Make them concise and relevant."""
+Suggest 3 specific, actionable follow-up questions the user might want to ask. Make them concise and relevant.
 
-            response = openai.chat.completions.create(
-                model=self.model,
+Return JSON: {{"questions": ["...", "...", "..."]}}"""
+
+            content = self._cached_complete(
                 messages=[
-                    {"role": "system", "content": "Suggest brief, relevant follow-up questions."},
+                    {"role": "system", "content": "Suggest brief, relevant follow-up questions. Always respond with valid JSON."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
-                max_tokens=200
+                model=self.fast_model,
+                max_tokens=200,
+                response_format={"type": "json_object"}
             )
             
-            suggestions = response.choices[0].message.content.strip().split('\n')
-            # Clean up suggestions
-            suggestions = [s.strip('- 123.') for s in suggestions if s.strip()]
-            return suggestions[:3]
+            questions = json.loads(content)["questions"]
+            return [q.strip() for q in questions if isinstance(q, str) and q.strip()][:3]
             
-        except:
+        except (APIError, json.JSONDecodeError, KeyError, TypeError):
             return [
                 "Show me more details about these results",
                 "What are the trends over time?",
                 "How does this compare to other regions?"
             ]
     
+    def describe_results(self, query: str, df: pd.DataFrame, user_question: str,
+                               follow_ups: Optional[list] = None) -> Tuple[str, list]:
+        """
+        Explain query results and suggest follow-ups, with both requests in flight at once
+        
+        Args:
+            query: SQL query executed
+            df: DataFrame with results
+            user_question: Original user question
+            follow_ups: Follow-up questions already returned by generate_sql_query;
+                when given, only the explanation is requested
+            
+        Returns:
+            Tuple of (explanation, suggested follow-up questions)
+        """
+        if follow_ups:
+            return self.explain_results(query, df, user_question), follow_ups
+        
+        async def both():
+            return await asyncio.gather(
+                asyncio.to_thread(self.explain_results, query, df, user_question),
+                asyncio.to_thread(self.suggest_follow_up_questions, user_question, df)
+            )
+        
+        explanation, suggestions = asyncio.run(both())
+        return explanation, suggestions
+    
     def validate_sql(self, sql: str) -> Dict[str, Any]:
         """
         Validate SQL query for safety
@@ -251,17 +646,18 @@ Suggest 3 specific, actionable follow-up questions the user might want to ask. M
         Returns:
             Dictionary with validation result
         """
+        if sqlglot is not None:
+            return self._validate_sql_ast(sql)
+        
         sql_lower = sql.lower().strip()
         
         # Check for dangerous operations
-        dangerous_keywords = ['drop', 'delete', 'truncate', 'alter', 'create', 'update', 'insert']
-        
-        for keyword in dangerous_keywords:
-            if keyword in sql_lower:
-                return {
-                    'valid': False,
-                    'error': f"Query contains potentially dangerous operation: {keyword.upper()}. Only SELECT queries are allowed."
-                }
+        match = _DANGEROUS_SQL.search(sql_lower)
+        if match:
+            return {
+                'valid': False,
+                'error': f"Query contains potentially dangerous operation: {match.group(1).upper()}. Only SELECT queries are allowed."
+            }
         
         # Must be a SELECT query
         if not sql_lower.startswith('select'):
@@ -278,6 +674,49 @@ Suggest 3 specific, actionable follow-up questions the user might want to ask. M
             'valid': True,
             'sql': sql
         }
+    
+    def _validate_sql_ast(self, sql: str) -> Dict[str, Any]:
+        """
+        Validate SQL by parsing it, so identifiers like created_at and
+        keywords inside comments or strings don't matter
+        
+        Args:
+            sql: SQL query to validate
+            
+        Returns:
+            Dictionary with validation result
+        """
+        try:
+            statements = [tree for tree in sqlglot.parse(sql, read='mysql') if tree is not None]
+        except sqlglot.errors.ParseError as e:
+            return {
+                'valid': False,
+                'error': f"Could not parse the generated SQL: {e}"
+            }
+        
+        if len(statements) != 1:
+            return {
+                'valid': False,
+                'error': "Only a single SELECT query is allowed."
+            }
+        
+        # The root node decides the statement type (UNION of SELECTs included)
+        tree = statements[0]
+        if not isinstance(tree, (exp.Select, exp.Union)):
+            return {
+                'valid': False,
+                'error': "Only SELECT queries are allowed for safety."
+            }
+        
+        # Add LIMIT if missing
+        if tree.args.get('limit') is None:
+            tree = tree.limit(1000)
+        
+        # Re-render without comments: MySQL runs the body of /*! ... */ ones
+        return {
+            'valid': True,
+            'sql': tree.sql(dialect='mysql', comments=False)
+        }
 
 
 # Cached instance
@@ -301,3 +740,23 @@ def get_ai_assistant(api_key: str, model: str = "gpt-4-turbo-preview") -> Option
     except Exception as e:
         st.error(f"Failed to initialize AI assistant: {e}")
         return None
+
+
+@st.cache_resource
+def get_openai_client(api_key: str) -> OpenAI:
+    """
+    Get or create a synchronous OpenAI client
+    
+    The client is shared across reruns, so its connection pool (and open
+    TLS sessions) survive between questions.
+    
+    Args:
+        api_key: OpenAI API key
+        
+    Returns:
+        OpenAI client instance
+    """
+    return OpenAI(
+        api_key=api_key,
+        http_client=httpx.Client(http2=HTTP2, limits=_http_limits())
+    )
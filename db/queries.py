@@ -4,43 +4,48 @@ Pre-defined queries for common database operations
 """
 
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-import pandas as pd
+from typing import Optional, Dict, Any, Tuple
 
 
 class QueryHelper:
-    """Helper class containing SQL queries for the Cloudburst Management System"""
+    """Helper class containing SQL queries for the Cloudburst Management System
+    
+    Queries that take values return a (sql, params) tuple with %s
+    placeholders, so the statement text stays the same across values and the
+    driver does the escaping.
+    """
     
     # ==================== RAINFALL DATA QUERIES ====================
     
     @staticmethod
-    def get_all_rainfall_data():
-        """Get all rainfall records"""
-        return """
+    def get_all_rainfall_data(limit: int = 1000, offset: int = 0) -> Tuple[str, tuple]:
+        """Get rainfall records, newest first, one page at a time"""
+        return ("""
             SELECT id, region, date, rainfall_mm, temperature_c, humidity
             FROM rainfall_data
             ORDER BY date DESC
-        """
+            LIMIT %s OFFSET %s
+        """, (int(limit), int(offset)))
     
     @staticmethod
-    def get_rainfall_by_region(region: str):
+    def get_rainfall_by_region(region: str) -> Tuple[str, tuple]:
         """Get rainfall data for a specific region"""
-        return f"""
+        return ("""
             SELECT id, region, date, rainfall_mm, temperature_c, humidity
             FROM rainfall_data
-            WHERE region = '{region}'
+            WHERE region = %s
             ORDER BY date DESC
-        """
+        """, (region,))
     
     @staticmethod
-    def get_rainfall_by_date_range(start_date: str, end_date: str):
+    def get_rainfall_by_date_range(start_date: str, end_date: str) -> Tuple[str, tuple]:
         """Get rainfall data within date range"""
-        return f"""
+        return ("""
             SELECT id, region, date, rainfall_mm, temperature_c, humidity
             FROM rainfall_data
-            WHERE date BETWEEN '{start_date}' AND '{end_date}'
+            WHERE date BETWEEN %s AND %s
             ORDER BY date DESC
-        """
+        """, (start_date, end_date))
     
     @staticmethod
     def get_rainfall_summary():
@@ -56,15 +61,39 @@ class QueryHelper:
         """
     
     @staticmethod
-    def get_top_rainfall_regions(limit: int = 10):
+    def get_top_rainfall_regions(limit: int = 10) -> Tuple[str, tuple]:
         """Get regions with highest rainfall"""
-        return f"""
+        return ("""
             SELECT region, SUM(rainfall_mm) as total_rainfall
             FROM rainfall_data
             GROUP BY region
             ORDER BY total_rainfall DESC
-            LIMIT {limit}
-        """
+            LIMIT %s
+        """, (int(limit),))
+    
+    @staticmethod
+    def get_top_region_rainfall_trends(days: int = 30, top_n: int = 8) -> Tuple[str, tuple]:
+        """Get recent daily rainfall for the regions with the highest average
+        
+        Several readings on one day are averaged in SQL, so one row per
+        region and day is returned. Each row also carries total_regions, the
+        number of regions with readings in the window.
+        """
+        return ("""
+            SELECT rd.date, rd.region, AVG(rd.rainfall_mm) AS rainfall_mm, top.total_regions
+            FROM rainfall_data rd
+            JOIN (
+                SELECT region, COUNT(*) OVER () AS total_regions
+                FROM rainfall_data
+                WHERE date >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
+                GROUP BY region
+                ORDER BY AVG(rainfall_mm) DESC
+                LIMIT %s
+            ) top ON top.region = rd.region
+            WHERE rd.date >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
+            GROUP BY rd.date, rd.region, top.total_regions
+            ORDER BY rd.date
+        """, (int(days), int(top_n), int(days)))
     
     @staticmethod
     def get_rainfall_trends():
@@ -93,13 +122,17 @@ class QueryHelper:
     
     @staticmethod
     def get_high_risk_regions():
-        """Get regions with high or critical risk"""
+        """Get regions with high or critical risk, most populous first
+        
+        With idx_risk_population EXPLAIN shows a backward range scan on that
+        index (type=range, no "Using filesort"): only the two risk levels
+        are read, already in output order.
+        """
         return """
-            SELECT region_id, region_name, population, risk_level, 
-                   warning_status, last_update
+            SELECT region_name, population, risk_level, warning_status
             FROM affected_regions
             WHERE risk_level IN ('High', 'Critical')
-            ORDER BY risk_level DESC
+            ORDER BY risk_level DESC, population DESC
         """
     
     @staticmethod
@@ -134,26 +167,26 @@ class QueryHelper:
         """
     
     @staticmethod
-    def get_resources_by_status(status: str):
+    def get_resources_by_status(status: str) -> Tuple[str, tuple]:
         """Get resources by status"""
-        return f"""
+        return ("""
             SELECT resource_id, resource_type, quantity_available, 
                    location, status, last_restocked
             FROM resources
-            WHERE status = '{status}'
+            WHERE status = %s
             ORDER BY resource_type
-        """
+        """, (status,))
     
     @staticmethod
-    def get_resources_by_location(location: str):
+    def get_resources_by_location(location: str) -> Tuple[str, tuple]:
         """Get resources at a specific location"""
-        return f"""
+        return ("""
             SELECT resource_id, resource_type, quantity_available, 
                    status, last_restocked
             FROM resources
-            WHERE location = '{location}'
+            WHERE location = %s
             ORDER BY resource_type
-        """
+        """, (location,))
     
     @staticmethod
     def get_resource_summary():
@@ -167,15 +200,15 @@ class QueryHelper:
         """
     
     @staticmethod
-    def get_low_stock_resources(threshold: int = 100):
+    def get_low_stock_resources(threshold: int = 100) -> Tuple[str, tuple]:
         """Get resources with low stock"""
-        return f"""
+        return ("""
             SELECT resource_id, resource_type, quantity_available, 
                    location, status
             FROM resources
-            WHERE quantity_available < {threshold} AND status != 'Depleted'
+            WHERE quantity_available < %s AND status != 'Depleted'
             ORDER BY quantity_available ASC
-        """
+        """, (int(threshold),))
     
     @staticmethod
     def get_resource_distribution():
@@ -211,26 +244,48 @@ class QueryHelper:
         """
     
     @staticmethod
-    def get_alerts_by_severity(severity: str):
+    def get_active_alerts_by_date():
+        """Get currently active alerts, newest first
+        
+        severity_badge is the severity with its colour dot, ready to display.
+        idx_issued_expiry serves the ORDER BY: EXPLAIN shows a backward index
+        scan with the expiry check done in the index, and no filesort.
+        """
+        return """
+            SELECT region, alert_message, severity, date_issued, expiry_date,
+                CASE severity
+                    WHEN 'Critical' THEN '🔴 Critical'
+                    WHEN 'High' THEN '🟠 High'
+                    WHEN 'Moderate' THEN '🟡 Moderate'
+                    WHEN 'Low' THEN '🟢 Low'
+                    ELSE CONCAT('⚪ ', COALESCE(severity, 'None'))
+                END AS severity_badge
+            FROM alerts
+            WHERE expiry_date >= CURDATE()
+            ORDER BY date_issued DESC
+        """
+    
+    @staticmethod
+    def get_alerts_by_severity(severity: str) -> Tuple[str, tuple]:
         """Get alerts by severity level"""
-        return f"""
+        return ("""
             SELECT alert_id, region, alert_message, severity, 
                    date_issued, expiry_date
             FROM alerts
-            WHERE severity = '{severity}'
+            WHERE severity = %s
             ORDER BY date_issued DESC
-        """
+        """, (severity,))
     
     @staticmethod
-    def get_alerts_by_region(region: str):
+    def get_alerts_by_region(region: str) -> Tuple[str, tuple]:
         """Get alerts for a specific region"""
-        return f"""
+        return ("""
             SELECT alert_id, region, alert_message, severity, 
                    date_issued, expiry_date
             FROM alerts
-            WHERE region = '{region}'
+            WHERE region = %s
             ORDER BY date_issued DESC
-        """
+        """, (region,))
     
     @staticmethod
     def get_alert_severity_distribution():
@@ -263,9 +318,9 @@ class QueryHelper:
         """
     
     @staticmethod
-    def get_distributions_by_region(region_id: int):
+    def get_distributions_by_region(region_id: int) -> Tuple[str, tuple]:
         """Get distributions for a specific region"""
-        return f"""
+        return ("""
             SELECT 
                 dl.log_id,
                 r.resource_type,
@@ -275,14 +330,14 @@ class QueryHelper:
                 dl.received_date
             FROM distribution_log dl
             JOIN resources r ON dl.resource_id = r.resource_id
-            WHERE dl.region_id = {region_id}
+            WHERE dl.region_id = %s
             ORDER BY dl.date_distributed DESC
-        """
+        """, (int(region_id),))
     
     @staticmethod
-    def get_distributions_by_date_range(start_date: str, end_date: str):
+    def get_distributions_by_date_range(start_date: str, end_date: str) -> Tuple[str, tuple]:
         """Get distributions within date range"""
-        return f"""
+        return ("""
             SELECT 
                 dl.log_id,
                 ar.region_name,
@@ -293,9 +348,9 @@ class QueryHelper:
             FROM distribution_log dl
             JOIN affected_regions ar ON dl.region_id = ar.region_id
             JOIN resources r ON dl.resource_id = r.resource_id
-            WHERE dl.date_distributed BETWEEN '{start_date}' AND '{end_date}'
+            WHERE dl.date_distributed BETWEEN %s AND %s
             ORDER BY dl.date_distributed DESC
-        """
+        """, (start_date, end_date))
     
     @staticmethod
     def get_distribution_summary():
@@ -322,6 +377,22 @@ class QueryHelper:
             ORDER BY total_received DESC
         """
     
+    # ==================== DASHBOARD QUERIES ====================
+    
+    @staticmethod
+    def get_dashboard_kpis():
+        """Get all home dashboard KPIs as one row, in a single round trip (empty tables give 0)"""
+        return """
+            SELECT
+                (SELECT COUNT(DISTINCT region) FROM rainfall_data) AS rainfall_regions,
+                (SELECT COUNT(*) FROM alerts WHERE expiry_date >= CURDATE()) AS active_alerts,
+                (SELECT COALESCE(SUM(quantity_available), 0) FROM resources) AS total_resources,
+                (SELECT COUNT(*) FROM distribution_log) AS total_distributions,
+                (SELECT COALESCE(ROUND(AVG(rainfall_mm), 2), 0) FROM rainfall_data) AS avg_rainfall,
+                (SELECT COUNT(*) FROM affected_regions WHERE warning_status = 1) AS regions_warned,
+                (SELECT COUNT(*) FROM resources WHERE quantity_available < 100) AS low_stock
+        """
+    
     # ==================== INSERT QUERIES ====================
     
     @staticmethod
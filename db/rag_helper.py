@@ -3,11 +3,167 @@ RAG (Retrieval-Augmented Generation) Helper for Database-Aware Chatbot
 Retrieves relevant database context before generating responses
 """
 
+import hashlib
+import re
+import time
+from collections import OrderedDict
+import numpy as np
 import streamlit as st
 from datetime import datetime, timedelta
 import pandas as pd
-from typing import Dict, List, Tuple, Optional
-from openai import OpenAI
+from typing import Dict, Iterator, List, Tuple, Optional
+from .connection import cached_reference, describe_table
+from .queries import QueryHelper
+from .openai_helper import EMBED_MODEL, SemanticCache, count_tokens, get_openai_client
+
+# Answers are reused for repeat questions: an exact tier keyed on the
+# normalized question and a semantic tier on question embeddings. Entries
+# expire after RESPONSE_CACHE_TTL so the statistics in an answer stay fresh.
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_TTL = 300.0
+# Paraphrases must be this close, and must also name the same tables,
+# regions and numbers (see _semantic_scope), to share an answer
+RESPONSE_SEMANTIC_THRESHOLD = 0.95
+
+# Token budget for the per-question part of the prompt
+MAX_CONTEXT_TOKENS = 1500
+
+# Seconds per-table context stays in context_cache; the schema is kept for
+# the life of the assistant
+CONTEXT_TTL = {
+    "statistics": 30.0,
+    "recent_data": 10.0,
+}
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_NUMBER = re.compile(r"\b\d+\b")
+
+# Greetings, thanks and questions about the assistant itself (matched against
+# the normalized query); these are answered without touching the database
+_SMALLTALK_PATTERN = re.compile(
+    r"(?:hi|hello|hey|hiya|howdy|yo|greetings|good (?:morning|afternoon|evening)"
+    r"|thanks|thank you|thx|cheers|ok|okay|cool|great|nice|bye|goodbye|see you"
+    r"|how are you|who are you|what are you|what can you do|help)"
+    r"(?: (?:there|again|so much|a lot|bot|assistant|doing|today|later))*"
+)
+
+# Queries shorter than this (in words) that name no table get schemas only
+MIN_CONTEXT_QUERY_WORDS = 3
+
+# Table relevance mapping
+TABLE_KEYWORDS = {
+    "rainfall_data": ["rainfall", "rain", "precipitation", "weather", "mm", "intensity"],
+    "affected_regions": ["region", "area", "population", "risk", "latitude", "longitude", "location"],
+    "resources": ["resource", "stock", "inventory", "supply", "kit", "food", "medical", "water", "shelter"],
+    "distribution_log": ["distribution", "distribute", "delivered", "dispatched", "sent", "quantity"],
+    "alerts": ["alert", "warning", "notification", "severity", "critical", "active", "status"]
+}
+
+# keyword -> tables it points to
+_KEYWORD_TABLES = {
+    keyword: {table for table, keywords in TABLE_KEYWORDS.items() if keyword in keywords}
+    for keywords in TABLE_KEYWORDS.values() for keyword in keywords
+}
+
+# Keywords match at the start of a word, so plurals and other endings
+# ("alerts", "distributed") count; longest first so "rainfall" beats "rain"
+_TABLE_KEYWORD_PATTERN = re.compile(
+    r"\b(" + "|".join(sorted(map(re.escape, _KEYWORD_TABLES), key=len, reverse=True)) + r")\w*"
+)
+
+
+def _normalize(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(_NON_WORD.sub(" ", query.lower()).split())
+
+
+def _is_smalltalk(query: str) -> bool:
+    """True if the query is a greeting or meta question, not a data question"""
+    return _SMALLTALK_PATTERN.fullmatch(_normalize(query)) is not None
+
+
+# One aggregate row per table; COUNT(*) comes first and doubles as the
+# table's row count in the context
+TABLE_STATISTICS_QUERIES = {
+    "rainfall_data": """
+        SELECT 
+            COUNT(*) as total_records,
+            COALESCE(ROUND(AVG(rainfall_mm), 2), 0) as avg_rainfall,
+            MAX(rainfall_mm) as max_rainfall,
+            MIN(rainfall_mm) as min_rainfall,
+            COUNT(DISTINCT region) as unique_regions
+        FROM rainfall_data
+    """,
+    "resources": """
+        SELECT 
+            COUNT(*) as total_resources,
+            SUM(quantity_available) as total_quantity,
+            COUNT(DISTINCT resource_type) as resource_types,
+            COALESCE(ROUND(AVG(quantity_available), 2), 0) as avg_quantity
+        FROM resources
+    """,
+    "alerts": """
+        SELECT 
+            COUNT(*) as total_alerts,
+            SUM(CASE WHEN expiry_date >= CURDATE() THEN 1 ELSE 0 END) as active_alerts,
+            COUNT(DISTINCT severity) as severity_levels
+        FROM alerts
+    """,
+    "distribution_log": """
+        SELECT 
+            COUNT(*) as total_distributions,
+            SUM(quantity_sent) as total_quantity,
+            COUNT(DISTINCT region_id) as regions_served
+        FROM distribution_log
+    """,
+    "affected_regions": """
+        SELECT 
+            COUNT(*) as total_regions,
+            CAST(COALESCE(FLOOR(AVG(population)), 0) AS SIGNED) as avg_population,
+            COUNT(DISTINCT risk_level) as risk_levels
+        FROM affected_regions
+    """,
+}
+
+# Latest rows per table, newest first; LIMIT is bound as a parameter. Each
+# row is pasted into the prompt whole, so only columns worth the model's
+# tokens are selected (no surrogate ids)
+RECENT_DATA_QUERIES = {
+    "rainfall_data": """
+        SELECT region, rainfall_mm, date
+        FROM rainfall_data
+        ORDER BY date DESC
+        LIMIT %s
+    """,
+    "alerts": """
+        SELECT region, alert_message, severity, date_issued, expiry_date
+        FROM alerts
+        ORDER BY date_issued DESC
+        LIMIT %s
+    """,
+    "resources": """
+        SELECT resource_type, quantity_available, location, status, last_restocked
+        FROM resources
+        ORDER BY last_restocked DESC
+        LIMIT %s
+    """,
+    "distribution_log": """
+        SELECT ar.region_name, r.resource_type, d.quantity_sent, 
+               d.distributed_by, d.date_distributed
+        FROM distribution_log d
+        JOIN affected_regions ar ON d.region_id = ar.region_id
+        JOIN resources r ON d.resource_id = r.resource_id
+        ORDER BY d.date_distributed DESC
+        LIMIT %s
+    """,
+    "affected_regions": """
+        SELECT region_name, population, risk_level, warning_status, last_update
+        FROM affected_regions
+        ORDER BY population DESC
+        LIMIT %s
+    """,
+}
+
 
 class RAGDatabaseAssistant:
     """
@@ -15,11 +171,25 @@ class RAGDatabaseAssistant:
     before generating AI responses
     """
     
-    def __init__(self, db_connection, api_key: str, model: str = "gpt-3.5-turbo"):
+    def __init__(self, db_connection, api_key: str, model: str = "gpt-3.5-turbo",
+                 cache_enabled: bool = True, max_context_tokens: int = MAX_CONTEXT_TOKENS):
         self.db = db_connection
-        self.client = OpenAI(api_key=api_key)
+        # Shared per API key, so its connection pool outlives the assistant
+        self.client = get_openai_client(api_key)
         self.model = model
+        self.max_context_tokens = max_context_tokens
+        self._system_prompt: Optional[str] = None
+        # (sql, params) or ("tables_info", table) -> (time stored, value)
         self.context_cache = {}
+        self.context_cache_stats = {"hits": 0, "misses": 0}
+        self.cache_enabled = cache_enabled
+        # question key -> (time stored, response); exact repeats (LRU)
+        self._responses: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._semantic_responses = SemanticCache(
+            size=RESPONSE_CACHE_SIZE,
+            threshold=RESPONSE_SEMANTIC_THRESHOLD,
+            ttl=RESPONSE_CACHE_TTL
+        )
         
     def retrieve_database_context(self, query: str) -> Dict[str, any]:
         """
@@ -37,15 +207,46 @@ class RAGDatabaseAssistant:
             # Determine which tables are relevant based on query keywords
             relevant_tables = self._identify_relevant_tables(query)
             
+            # Get table schema
             for table in relevant_tables:
-                # Get table schema and sample data
-                context["tables_info"][table] = self._get_table_info(table)
-                
-                # Get statistics for the table
-                context["statistics"][table] = self._get_table_statistics(table)
-                
-                # Get recent data samples
-                context["recent_data"][table] = self._get_recent_data(table)
+                context["tables_info"][table] = dict(self._get_table_info_cached(table))
+            
+            # A short query that names no table ("any updates?") gets just the
+            # schemas; statistics and samples wouldn't sharpen the answer
+            if (len(_normalize(query).split()) < MIN_CONTEXT_QUERY_WORDS
+                    and not _TABLE_KEYWORD_PATTERN.search(query.lower())):
+                context["metadata"] = self._get_database_metadata()
+                return context
+            
+            # Statistics and recent rows still in context_cache are reused;
+            # the remaining SELECTs are independent, so they all go out at
+            # once over the connection pool
+            tasks = []
+            for table in relevant_tables:
+                for kind in ("statistics", "recent_data"):
+                    query_key = self._context_query(table, kind)
+                    cached = self._context_cache_get(query_key, CONTEXT_TTL[kind])
+                    if cached is None:
+                        tasks.append((table, kind, query_key))
+                    else:
+                        context[kind][table] = cached
+            
+            results = self.db.gather_queries(*(query_key for _, _, query_key in tasks))
+            
+            for (table, kind, query_key), rows in zip(tasks, results):
+                if kind == "statistics":
+                    value = dict(rows[0]) if rows else {}
+                else:
+                    value = rows or []
+                context[kind][table] = value
+                if rows is not None:
+                    self.context_cache[query_key] = (time.monotonic(), value)
+            
+            # The statistics aggregate's first column is the table's row count
+            for table in relevant_tables:
+                stats = context["statistics"].get(table)
+                if stats and "columns" in context["tables_info"][table]:
+                    context["tables_info"][table]["row_count"] = next(iter(stats.values()))
             
             # Get overall database metadata
             context["metadata"] = self._get_database_metadata()
@@ -58,220 +259,76 @@ class RAGDatabaseAssistant:
     
     def _identify_relevant_tables(self, query: str) -> List[str]:
         """Identify which database tables are relevant to the query"""
-        query_lower = query.lower()
-        relevant_tables = []
-        
-        # Table relevance mapping
-        table_keywords = {
-            "rainfall_data": ["rainfall", "rain", "precipitation", "weather", "mm", "intensity"],
-            "affected_regions": ["region", "area", "population", "risk", "latitude", "longitude", "location"],
-            "resources": ["resource", "stock", "inventory", "supply", "kit", "food", "medical", "water", "shelter"],
-            "distribution_log": ["distribution", "distribute", "delivered", "dispatched", "sent", "quantity"],
-            "alerts": ["alert", "warning", "notification", "severity", "critical", "active", "status"]
-        }
-        
-        # Check each table for keyword matches
-        for table, keywords in table_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
-                relevant_tables.append(table)
+        # One regex pass over the query; each matched keyword names its tables
+        matched = set()
+        for keyword in _TABLE_KEYWORD_PATTERN.findall(query.lower()):
+            matched.update(_KEYWORD_TABLES[keyword])
         
         # If no specific tables found, include all for general queries
-        if not relevant_tables:
-            relevant_tables = list(table_keywords.keys())
-        
-        return relevant_tables
+        return [table for table in TABLE_KEYWORDS if table in matched] or list(TABLE_KEYWORDS)
     
     def _get_table_info(self, table_name: str) -> Dict:
         """Get table schema and structure information"""
         try:
-            query = f"DESCRIBE {table_name}"
-            result = self.db.execute_query(query)
+            result = describe_table(self.db, table_name)
             
             if result:
-                columns = [{"name": row[0], "type": row[1], "null": row[2], "key": row[3]} 
+                columns = [{"name": row['Field'], "type": row['Type'], "null": row['Null'], "key": row['Key']} 
                           for row in result]
                 
-                # Get row count
-                count_query = f"SELECT COUNT(*) FROM {table_name}"
-                count_result = self.db.execute_query(count_query)
-                row_count = count_result[0][0] if count_result else 0
-                
+                # row_count is filled in from the table's statistics query
                 return {
                     "columns": columns,
-                    "row_count": row_count
+                    "row_count": 0
                 }
         except Exception as e:
             return {"error": str(e)}
         
         return {}
     
-    def _get_table_statistics(self, table_name: str) -> Dict:
-        """Get statistical information about the table"""
-        stats = {}
+    def _get_table_info_cached(self, table_name: str) -> Dict:
+        """_get_table_info, kept in context_cache once it succeeds"""
+        key = ("tables_info", table_name)
+        info = self._context_cache_get(key)
+        if info is None:
+            info = self._get_table_info(table_name)
+            if "columns" in info:
+                self.context_cache[key] = (time.monotonic(), info)
+        return info
+    
+    def _context_cache_get(self, key, ttl: Optional[float] = None):
+        """
+        Value stored in context_cache under key, counting the hit or miss
         
-        try:
-            if table_name == "rainfall_data":
-                query = """
-                SELECT 
-                    COUNT(*) as total_records,
-                    AVG(rainfall_mm) as avg_rainfall,
-                    MAX(rainfall_mm) as max_rainfall,
-                    MIN(rainfall_mm) as min_rainfall,
-                    COUNT(DISTINCT region) as unique_regions
-                FROM rainfall_data
-                """
-                result = self.db.execute_query(query)
-                if result:
-                    stats = {
-                        "total_records": result[0][0],
-                        "avg_rainfall": round(result[0][1], 2) if result[0][1] else 0,
-                        "max_rainfall": result[0][2],
-                        "min_rainfall": result[0][3],
-                        "unique_regions": result[0][4]
-                    }
-            
-            elif table_name == "resources":
-                query = """
-                SELECT 
-                    COUNT(*) as total_resources,
-                    SUM(quantity_available) as total_quantity,
-                    COUNT(DISTINCT resource_type) as resource_types,
-                    AVG(quantity_available) as avg_quantity
-                FROM resources
-                """
-                result = self.db.execute_query(query)
-                if result:
-                    stats = {
-                        "total_resources": result[0][0],
-                        "total_quantity": result[0][1],
-                        "resource_types": result[0][2],
-                        "avg_quantity": round(result[0][3], 2) if result[0][3] else 0
-                    }
-            
-            elif table_name == "alerts":
-                query = """
-                SELECT 
-                    COUNT(*) as total_alerts,
-                    SUM(CASE WHEN expiry_date >= CURDATE() THEN 1 ELSE 0 END) as active_alerts,
-                    COUNT(DISTINCT severity) as severity_levels
-                FROM alerts
-                """
-                result = self.db.execute_query(query)
-                if result:
-                    stats = {
-                        "total_alerts": result[0][0],
-                        "active_alerts": result[0][1],
-                        "severity_levels": result[0][2]
-                    }
-            
-            elif table_name == "distribution_log":
-                query = """
-                SELECT 
-                    COUNT(*) as total_distributions,
-                    SUM(quantity_sent) as total_quantity,
-                    COUNT(DISTINCT region_id) as regions_served
-                FROM distribution_log
-                """
-                result = self.db.execute_query(query)
-                if result:
-                    stats = {
-                        "total_distributions": result[0][0],
-                        "total_quantity": result[0][1],
-                        "regions_served": result[0][2]
-                    }
+        Args:
+            key: Cache key
+            ttl: Seconds the value stays valid (None: no expiry)
             
-            elif table_name == "affected_regions":
-                query = """
-                SELECT 
-                    COUNT(*) as total_regions,
-                    AVG(population) as avg_population,
-                    COUNT(DISTINCT risk_level) as risk_levels
-                FROM affected_regions
-                """
-                result = self.db.execute_query(query)
-                if result:
-                    stats = {
-                        "total_regions": result[0][0],
-                        "avg_population": int(result[0][1]) if result[0][1] else 0,
-                        "risk_levels": result[0][2]
-                    }
-        
-        except Exception as e:
-            stats["error"] = str(e)
-        
-        return stats
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        entry = self.context_cache.get(key)
+        if entry is not None and (ttl is None or time.monotonic() - entry[0] <= ttl):
+            self.context_cache_stats["hits"] += 1
+            return entry[1]
+        self.context_cache_stats["misses"] += 1
+        return None
     
-    def _get_recent_data(self, table_name: str, limit: int = 5) -> List[Dict]:
-        """Get recent data samples from the table"""
-        try:
-            if table_name == "rainfall_data":
-                query = f"""
-                SELECT id, region, rainfall_mm, date, temperature_c, humidity
-                FROM rainfall_data
-                ORDER BY date DESC
-                LIMIT {limit}
-                """
-            elif table_name == "alerts":
-                query = f"""
-                SELECT alert_id, region, alert_message, severity, date_issued, expiry_date
-                FROM alerts
-                ORDER BY date_issued DESC
-                LIMIT {limit}
-                """
-            elif table_name == "resources":
-                query = f"""
-                SELECT resource_id, resource_type, quantity_available, location, status, last_restocked
-                FROM resources
-                ORDER BY last_restocked DESC
-                LIMIT {limit}
-                """
-            elif table_name == "distribution_log":
-                query = f"""
-                SELECT d.log_id, ar.region_name, r.resource_type, d.quantity_sent, 
-                       d.distributed_by, d.date_distributed
-                FROM distribution_log d
-                JOIN affected_regions ar ON d.region_id = ar.region_id
-                JOIN resources r ON d.resource_id = r.resource_id
-                ORDER BY d.date_distributed DESC
-                LIMIT {limit}
-                """
-            elif table_name == "affected_regions":
-                query = f"""
-                SELECT region_id, region_name, population, risk_level, warning_status, last_update
-                FROM affected_regions
-                ORDER BY population DESC
-                LIMIT {limit}
-                """
-            else:
-                return []
-            
-            result = self.db.execute_query(query)
-            if result and len(result) > 0:
-                # Get column names from the query
-                if table_name == "rainfall_data":
-                    columns = ['id', 'region', 'rainfall_mm', 'date', 'temperature_c', 'humidity']
-                elif table_name == "alerts":
-                    columns = ['alert_id', 'region', 'alert_message', 'severity', 'date_issued', 'expiry_date']
-                elif table_name == "resources":
-                    columns = ['resource_id', 'resource_type', 'quantity_available', 'location', 'status', 'last_restocked']
-                elif table_name == "distribution_log":
-                    columns = ['log_id', 'region_name', 'resource_type', 'quantity_sent', 'distributed_by', 'date_distributed']
-                elif table_name == "affected_regions":
-                    columns = ['region_id', 'region_name', 'population', 'risk_level', 'warning_status', 'last_update']
-                else:
-                    # Fallback - use query results as is
-                    return [dict(enumerate(row)) for row in result[:limit]]
-                
-                # Convert to list of dictionaries with proper column names
-                records = []
-                for row in result[:limit]:
-                    records.append(dict(zip(columns, row)))
-                return records
-        
-        except Exception as e:
-            return [{"error": str(e)}]
+    def _context_query(self, table_name: str, kind: str, limit: int = 5) -> Tuple[str, tuple]:
+        """
+        SQL for one piece of a table's context
         
-        return []
+        Args:
+            table_name: One of the tables in TABLE_STATISTICS_QUERIES
+            kind: "statistics" (one aggregate row) or "recent_data" (latest rows)
+            limit: Number of recent rows
+            
+        Returns:
+            Tuple of (sql, params)
+        """
+        if kind == "statistics":
+            return TABLE_STATISTICS_QUERIES[table_name], None
+        return RECENT_DATA_QUERIES[table_name], (limit,)
     
     def _get_database_metadata(self) -> Dict:
         """Get overall database metadata"""
@@ -289,25 +346,58 @@ class RAGDatabaseAssistant:
         1. Retrieve relevant database context
         2. Augment prompt with context
         3. Generate response with OpenAI
+        
+        The "response" entry is an iterator of text chunks as the model
+        streams them, ready for st.write_stream.
         """
         try:
-            # Step 1: RETRIEVE - Get relevant database context
-            with st.spinner("🔍 Retrieving relevant database information..."):
-                db_context = self.retrieve_database_context(user_query)
+            key = embedding = None
+            if self.cache_enabled:
+                key = self._response_key(user_query, chat_history)
+                cached = self._cached_response(key)
+                if cached is not None:
+                    return dict(cached, response=iter([cached["response"]]), query=user_query)
+            
+            # A paraphrase only matches when no history shapes the answer
+            scope = None
+            if self.cache_enabled and not chat_history:
+                embedding = self._embed_query(user_query)
+                if embedding is not None:
+                    scope = self._semantic_scope(user_query)
+                    cached = self._semantic_responses.lookup(embedding, tag=scope)
+                    if cached is not None:
+                        return dict(cached, response=iter([cached["response"]]), query=user_query)
+            
+            # Step 1: RETRIEVE - Get relevant database context (only once no
+            # cached answer applies). Small talk needs no data, so nothing is
+            # retrieved for it
+            if _is_smalltalk(user_query):
+                db_context = {
+                    "tables_info": {},
+                    "statistics": {},
+                    "recent_data": {},
+                    "metadata": self._get_database_metadata()
+                }
+            else:
+                with st.spinner("🔍 Retrieving relevant database information..."):
+                    db_context = self.retrieve_database_context(user_query)
             
-            # Step 2: AUGMENT - Build enriched prompt with context
-            enriched_prompt = self._build_augmented_prompt(user_query, db_context, chat_history)
+            # Step 2: AUGMENT - Build the per-question prompt with context
+            user_prompt = self._dynamic_user_prompt(user_query, db_context, chat_history)
             
-            # Step 3: GENERATE - Get AI response
+            # Step 3: GENERATE - Start streaming the AI response
             with st.spinner("🤖 Generating AI response..."):
-                ai_response = self._generate_ai_response(enriched_prompt, user_query)
+                ai_response = self._generate_ai_response(user_prompt, user_query)
             
-            return {
+            result = {
                 "success": True,
                 "response": ai_response,
                 "context_used": db_context,
                 "query": user_query
             }
+            if self.cache_enabled:
+                result["response"] = self._stream_and_store(ai_response, key, embedding, scope, result)
+            return result
         
         except Exception as e:
             return {
@@ -316,86 +406,198 @@ class RAGDatabaseAssistant:
                 "query": user_query
             }
     
-    def _build_augmented_prompt(self, user_query: str, db_context: Dict, 
-                                chat_history: List[Dict] = None) -> str:
-        """Build enriched prompt with database context"""
+    def _stream_and_store(self, chunks: Iterator[str], key: str, embedding: Optional[np.ndarray],
+                          scope: Optional[Tuple], result: Dict) -> Iterator[str]:
+        """Pass streamed chunks through, caching the full answer once it completes"""
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        self._store_response(key, embedding, scope, dict(result, response="".join(parts)))
+    
+    def _response_key(self, user_query: str, chat_history: List[Dict] = None) -> str:
+        """Exact-cache key: the normalized question plus the history the prompt uses"""
+        history = [
+            (msg.get("role", ""), msg.get("content", "")[:200])
+            for msg in (chat_history or [])[-3:]
+        ]
+        return hashlib.sha256(repr((_normalize(user_query), history)).encode()).hexdigest()
+    
+    def _cached_response(self, key: str) -> Optional[Dict]:
+        """Response stored under key, unless it has expired"""
+        entry = self._responses.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if time.monotonic() - stored_at > RESPONSE_CACHE_TTL:
+            del self._responses[key]
+            return None
+        self._responses.move_to_end(key)
+        return response
+    
+    def _store_response(self, key: str, embedding: Optional[np.ndarray],
+                        scope: Optional[Tuple], response: Dict):
+        """Add a response to the exact tier and, if embedded, the semantic tier"""
+        self._responses[key] = (time.monotonic(), response)
+        if len(self._responses) > RESPONSE_CACHE_SIZE:
+            self._responses.popitem(last=False)
+        if embedding is not None:
+            self._semantic_responses.add(embedding, response, tag=scope)
+    
+    def _semantic_scope(self, user_query: str) -> Tuple:
+        """
+        What a question is about, beyond its wording: the tables it points
+        to, the known region names and the numbers (years, counts, days) in
+        it. Embeddings of "rainfall in Pune" and "rainfall in Mumbai" are
+        close, so the semantic tier only matches questions with equal scopes.
+        """
+        normalized = f" {_normalize(user_query)} "
+        regions = tuple(name for name in self._region_names() if f" {name} " in normalized)
+        numbers = tuple(sorted(set(_NUMBER.findall(normalized))))
+        return tuple(self._identify_relevant_tables(user_query)), regions, numbers
+    
+    def _region_names(self) -> List[str]:
+        """Normalized region names from affected_regions (cached lookup)"""
+        df = cached_reference(
+            self.db, QueryHelper.get_distinct_values("affected_regions", "region_name")
+        )
+        if df is None or df.empty:
+            return []
+        return [name for name in (_normalize(str(v)) for v in df["value"]) if name]
+    
+    def _embed_query(self, user_query: str) -> Optional[np.ndarray]:
+        """Unit-length question embedding, or None if the request failed"""
+        try:
+            response = self.client.embeddings.create(model=EMBED_MODEL, input=_normalize(user_query))
+        except Exception:
+            return None
+        vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+    
+    def _static_system_prompt(self) -> str:
+        """
+        System message with the schema and answering instructions
         
-        # Start with system context
-        prompt = """You are an AI assistant for the Cloudburst Management System database.
+        It doesn't depend on the question, so it is built once (after every
+        table's DESCRIBE has succeeded) and every request starts with the
+        same text, which OpenAI's prompt prefix cache can match.
+        """
+        if self._system_prompt is not None:
+            return self._system_prompt
+        
+        parts = ["""You are a helpful database assistant for the Cloudburst Management System.
 You have access to real-time database information and should provide accurate, helpful responses.
 
-DATABASE CONTEXT:
-"""
+=== DATABASE SCHEMA ===
+"""]
+        complete = True
+        for table_name in TABLE_KEYWORDS:
+            info = self._get_table_info_cached(table_name)
+            if info.get('columns'):
+                parts.append(f"{table_name.upper()}: {', '.join(col['name'] for col in info['columns'])}\n")
+            else:
+                complete = False
+        
+        parts.append("""
+INSTRUCTIONS:
+- Provide accurate, data-driven responses based on the database context
+- If asked to query data, suggest SQL queries when appropriate
+- Highlight important insights and patterns
+- Be conversational but precise
+- If you need more information, ask clarifying questions
+- Format responses clearly with markdown when appropriate""")
         
-        # Add table information
-        if db_context.get("tables_info"):
-            prompt += "\n=== AVAILABLE TABLES ===\n"
-            for table_name, info in db_context["tables_info"].items():
-                prompt += f"\n{table_name.upper()}:\n"
-                prompt += f"  - Rows: {info.get('row_count', 'N/A')}\n"
-                if info.get('columns'):
-                    prompt += f"  - Columns: {', '.join([col['name'] for col in info['columns']])}\n"
+        prompt = "".join(parts)
+        if complete:
+            self._system_prompt = prompt
+        return prompt
+    
+    def _dynamic_user_prompt(self, user_query: str, db_context: Dict,
+                             chat_history: List[Dict] = None) -> str:
+        """
+        Per-question prompt: statistics, recent rows, history and the question
+        
+        Recent-row samples are dropped, last table first, until the prompt
+        fits in max_context_tokens (the rest is small and always kept).
+        """
+        head = ["DATABASE CONTEXT:\n"]
         
         # Add statistics
         if db_context.get("statistics"):
-            prompt += "\n=== CURRENT STATISTICS ===\n"
+            head.append("\n=== CURRENT STATISTICS ===\n")
             for table_name, stats in db_context["statistics"].items():
                 if stats and not stats.get("error"):
-                    prompt += f"\n{table_name.upper()}:\n"
-                    for key, value in stats.items():
-                        prompt += f"  - {key}: {value}\n"
+                    head.append(f"\n{table_name.upper()}:\n")
+                    head.extend(f"  - {key}: {value}\n" for key, value in stats.items())
         
-        # Add recent data samples
-        if db_context.get("recent_data"):
-            prompt += "\n=== RECENT DATA SAMPLES ===\n"
-            for table_name, data in db_context["recent_data"].items():
-                if data and len(data) > 0:
-                    prompt += f"\n{table_name.upper()} (latest {len(data)} records):\n"
-                    for record in data[:3]:  # Show top 3
-                        prompt += f"  {record}\n"
+        tail = []
         
         # Add chat history for context continuity
-        if chat_history and len(chat_history) > 0:
-            prompt += "\n=== CONVERSATION HISTORY ===\n"
+        if chat_history:
+            tail.append("\n=== CONVERSATION HISTORY ===\n")
             for msg in chat_history[-3:]:  # Last 3 messages
                 role = msg.get("role", "unknown")
                 content = msg.get("content", "")
-                prompt += f"{role.upper()}: {content[:200]}...\n"
+                tail.append(f"{role.upper()}: {content[:200]}...\n")
         
         # Add the user's current question
-        prompt += f"\n=== USER QUESTION ===\n{user_query}\n\n"
+        tail.append(f"\n=== USER QUESTION ===\n{user_query}\n\nPlease answer the user's question:")
         
-        # Add instructions
-        prompt += """
-INSTRUCTIONS:
-- Provide accurate, data-driven responses based on the database context
-- If asked to query data, suggest SQL queries when appropriate
-- Highlight important insights and patterns
-- Be conversational but precise
-- If you need more information, ask clarifying questions
-- Format responses clearly with markdown when appropriate
-
-Please answer the user's question:"""
+        head, tail = "".join(head), "".join(tail)
         
-        return prompt
+        # Recent data samples go in between; only they are re-rendered while
+        # the prompt is cut down to the budget
+        samples = [
+            (table_name, list(data[:3]))  # Show top 3
+            for table_name, data in db_context.get("recent_data", {}).items()
+            if data
+        ]
+        while True:
+            prompt = "".join((head, self._render_samples(samples), tail))
+            if not samples or count_tokens(prompt, self.model) <= self.max_context_tokens:
+                return prompt
+            samples[-1][1].pop()
+            if not samples[-1][1]:
+                samples.pop()
+    
+    @staticmethod
+    def _render_samples(samples: List[Tuple[str, list]]) -> str:
+        """Format the recent data samples section"""
+        if not samples:
+            return ""
+        parts = ["\n=== RECENT DATA SAMPLES ===\n"]
+        for table_name, records in samples:
+            parts.append(f"\n{table_name.upper()} (latest {len(records)} records):\n")
+            parts.extend(f"  {record}\n" for record in records)
+        return "".join(parts)
     
-    def _generate_ai_response(self, enriched_prompt: str, original_query: str) -> str:
-        """Generate AI response using OpenAI"""
+    def _generate_ai_response(self, user_prompt: str, original_query: str) -> Iterator[str]:
+        """
+        Generate AI response using OpenAI
+        
+        The request is made here, so API errors are raised to the caller;
+        the returned iterator then yields the text as it streams in.
+        """
         try:
-            response = self.client.chat.completions.create(
+            stream = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": "You are a helpful database assistant for a Cloudburst Management System."},
-                    {"role": "user", "content": enriched_prompt}
+                    {"role": "system", "content": self._static_system_prompt()},
+                    {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.7,
-                max_tokens=1500
+                max_tokens=1500,
+                stream=True
             )
-            
-            return response.choices[0].message.content
-        
         except Exception as e:
             raise Exception(f"OpenAI API error: {str(e)}")
+        
+        return (
+            chunk.choices[0].delta.content
+            for chunk in stream
+            if chunk.choices and chunk.choices[0].delta.content
+        )
     
     def suggest_queries(self, based_on_context: Dict) -> List[str]:
         """Suggest relevant follow-up queries based on database context"""
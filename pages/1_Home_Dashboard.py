@@ -2,18 +2,15 @@
 🏠 Home Dashboard - Overview and KPIs
 """
 
+from functools import partial
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from db.connection import init_connection
+from db.connection import init_connection, cached_dataframe, cached_query, cached_summary, clear_query_cache, report_error
 from db.queries import QueryHelper
 from datetime import datetime, timedelta
-import sys
-from pathlib import Path
-
-# Add parent directory to path
-sys.path.append(str(Path(__file__).parent.parent))
 
 # Page config
 st.set_page_config(
@@ -45,42 +42,38 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Cloudburst risk tiers by code; position in each array is the tier's code
+RISK_LEVELS = np.array(['Minimal', 'Low', 'Moderate', 'High'], dtype=object)
+RISK_INDICATORS = np.array(['🟢', '🟡', '🟠', '🔴'], dtype=object)
+RISK_SCORES = np.array([15, 40, 65, 90])
+
 def get_kpi_metrics(db):
     """Fetch KPI metrics from database"""
     try:
-        # Rainfall regions count
-        regions_query = "SELECT COUNT(DISTINCT region) as count FROM rainfall_data"
-        regions_result = db.execute_query(regions_query)
-        rainfall_regions = regions_result[0]['count'] if regions_result else 0
-        
-        # Active alerts count
-        alerts_query = QueryHelper.get_active_alerts()
-        alerts_df = db.fetch_dataframe(alerts_query)
-        active_alerts = len(alerts_df)
-        
-        # Available resources count
-        resources_query = "SELECT SUM(quantity_available) as total FROM resources"
-        resources_result = db.execute_query(resources_query)
-        total_resources = resources_result[0]['total'] if resources_result and resources_result[0]['total'] else 0
-        
-        # Distribution logs count
-        distributions_query = "SELECT COUNT(*) as count FROM distribution_log"
-        dist_result = db.execute_query(distributions_query)
-        total_distributions = dist_result[0]['count'] if dist_result else 0
+        # Every KPI card and Quick Stat comes from one row of scalar subqueries
+        result = cached_query(db, QueryHelper.get_dashboard_kpis())
+        # The zero defaults only matter if the query itself failed
+        row = result[0] if result else {}
         
         return {
-            'rainfall_regions': rainfall_regions,
-            'active_alerts': active_alerts,
-            'total_resources': int(total_resources),
-            'total_distributions': total_distributions
+            'rainfall_regions': row.get('rainfall_regions') or 0,
+            'active_alerts': row.get('active_alerts') or 0,
+            'total_resources': int(row.get('total_resources') or 0),
+            'total_distributions': row.get('total_distributions') or 0,
+            'avg_rainfall': float(row.get('avg_rainfall') or 0),
+            'regions_warned': row.get('regions_warned') or 0,
+            'low_stock': row.get('low_stock') or 0
         }
     except Exception as e:
-        st.error(f"Error fetching KPIs: {e}")
+        report_error(f"Error fetching KPIs: {e}")
         return {
             'rainfall_regions': 0,
             'active_alerts': 0,
             'total_resources': 0,
-            'total_distributions': 0
+            'total_distributions': 0,
+            'avg_rainfall': 0,
+            'regions_warned': 0,
+            'low_stock': 0
         }
 
 def predict_cloudburst_risk(db):
@@ -98,46 +91,39 @@ def predict_cloudburst_risk(db):
             HAVING avg_rainfall > 0
             ORDER BY avg_rainfall DESC
         """
-        df = db.fetch_dataframe(query)
+        df = cached_dataframe(db, query)
         
-        if df.empty:
+        if df is None or df.empty:
             return pd.DataFrame()
         
-        # Cloudburst risk prediction logic
+        # Cloudburst risk prediction logic, first matching tier wins
         # High risk: avg > 200mm or max > 300mm
         # Moderate risk: avg > 150mm or max > 250mm
         # Low risk: avg > 100mm or max > 200mm
-        
-        def calculate_risk(row):
-            avg = row['avg_rainfall']
-            max_val = row['max_rainfall']
-            
-            if avg > 200 or max_val > 300:
-                return 'High', '🔴', 90
-            elif avg > 150 or max_val > 250:
-                return 'Moderate', '🟠', 65
-            elif avg > 100 or max_val > 200:
-                return 'Low', '🟡', 40
-            else:
-                return 'Minimal', '🟢', 15
-        
-        df[['risk_level', 'indicator', 'risk_score']] = df.apply(
-            lambda row: pd.Series(calculate_risk(row)), axis=1
-        )
+        avg = df['avg_rainfall'].to_numpy(dtype=np.float64)
+        max_val = df['max_rainfall'].to_numpy(dtype=np.float64)
+        conditions = [
+            (avg > 200) | (max_val > 300),
+            (avg > 150) | (max_val > 250),
+            (avg > 100) | (max_val > 200)
+        ]
+        codes = np.select(conditions, [3, 2, 1], default=0)
+        
+        df['risk_level'] = RISK_LEVELS[codes]
+        df['indicator'] = RISK_INDICATORS[codes]
+        df['risk_score'] = RISK_SCORES[codes]
         
         return df
         
     except Exception as e:
-        st.error(f"Error predicting cloudburst risk: {e}")
+        report_error(f"Error predicting cloudburst risk: {e}")
         return pd.DataFrame()
 
-def display_cloudburst_predictions(db):
+def display_cloudburst_predictions(predictions_df):
     """Display cloudburst prediction dashboard"""
     st.markdown("### 🌩️ Cloudburst Risk Prediction")
     st.markdown("*Based on 7-day rainfall pattern analysis*")
     
-    predictions_df = predict_cloudburst_risk(db)
-    
     if predictions_df.empty:
         st.info("📊 Insufficient data for predictions. Need at least 7 days of rainfall data.")
         return
@@ -145,10 +131,12 @@ def display_cloudburst_predictions(db):
     # Summary metrics
     col1, col2, col3, col4 = st.columns(4)
     
-    high_risk_count = len(predictions_df[predictions_df['risk_level'] == 'High'])
-    moderate_risk_count = len(predictions_df[predictions_df['risk_level'] == 'Moderate'])
-    low_risk_count = len(predictions_df[predictions_df['risk_level'] == 'Low'])
-    safe_count = len(predictions_df[predictions_df['risk_level'] == 'Minimal'])
+    # One counting pass, shared with the distribution pie chart below
+    risk_counts = predictions_df['risk_level'].value_counts()
+    high_risk_count = int(risk_counts.get('High', 0))
+    moderate_risk_count = int(risk_counts.get('Moderate', 0))
+    low_risk_count = int(risk_counts.get('Low', 0))
+    safe_count = int(risk_counts.get('Minimal', 0))
     
     with col1:
         st.metric("🔴 High Risk Regions", high_risk_count)
@@ -184,11 +172,11 @@ def display_cloudburst_predictions(db):
             height=350,
             showlegend=True
         )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True, key="risk_scores")
     
     with col2:
         # Risk level distribution pie chart
-        risk_dist = predictions_df['risk_level'].value_counts().reset_index()
+        risk_dist = risk_counts.reset_index()
         risk_dist.columns = ['Risk Level', 'Count']
         
         fig_pie = px.pie(
@@ -205,7 +193,7 @@ def display_cloudburst_predictions(db):
             }
         )
         fig_pie.update_layout(template='plotly_dark', height=350)
-        st.plotly_chart(fig_pie, use_container_width=True)
+        st.plotly_chart(fig_pie, use_container_width=True, key="risk_distribution")
     
     # Detailed risk table
     with st.expander("📋 Detailed Risk Assessment"):
@@ -228,36 +216,38 @@ def display_cloudburst_predictions(db):
             }
         )
 
-def plot_rainfall_trends(db):
+def get_rainfall_trends(db):
+    """Fetch the last 30 days of rainfall for the trend chart"""
+    # Limit number of regions displayed to avoid clutter; the top 8 are
+    # picked in SQL so only their rows are fetched
+    query, params = QueryHelper.get_top_region_rainfall_trends(days=30, top_n=8)
+    return cached_dataframe(db, query, params)
+
+def plot_rainfall_trends(df):
     """Create rainfall trend chart"""
     try:
-        query = """
-            SELECT date, region, rainfall_mm 
-            FROM rainfall_data 
-            WHERE date >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)
-            ORDER BY date
-        """
-        df = db.fetch_dataframe(query)
-        
-        if df.empty:
+        if df is None or df.empty:
             st.info("No rainfall data available for the last 30 days")
             return
         
-        # Limit number of regions displayed to avoid clutter
-        top_regions = df.groupby('region')['rainfall_mm'].mean().nlargest(8).index
-        df_filtered = df[df['region'].isin(top_regions)]
-        
-        fig = px.line(
-            df_filtered, 
-            x='date', 
-            y='rainfall_mm', 
-            color='region',
-            title='📊 Rainfall Trends (Last 30 Days) - Top 8 Regions by Average',
-            labels={'rainfall_mm': 'Rainfall (mm)', 'date': 'Date', 'region': 'Region'},
-            template='plotly_dark'
-        )
+        # One WebGL trace per region; SVG lines get sluggish once every
+        # region carries 30 days of points
+        fig = go.Figure([
+            go.Scattergl(
+                x=group['date'],
+                y=group['rainfall_mm'],
+                name=region,
+                mode='lines',
+                line=dict(width=2.5),
+                hovertemplate='%{y:.1f} mm<extra>%{fullData.name}</extra>'
+            )
+            for region, group in df.groupby('region', sort=True)
+        ])
         
         fig.update_layout(
+            title='📊 Rainfall Trends (Last 30 Days) - Top 8 Regions by Average',
+            template='plotly_dark',
+            legend_title_text='Region',
             height=450,
             hovermode='x unified',
             legend=dict(
@@ -275,28 +265,32 @@ def plot_rainfall_trends(db):
             yaxis_title="Rainfall (mm)"
         )
         
-        fig.update_traces(line=dict(width=2.5), marker=dict(size=4))
-        
-        st.plotly_chart(fig, use_container_width=True)
+        # Charts carry stable keys so a rerun updates the existing chart
+        # element in place (keeping zoom and legend state) instead of a new one
+        st.plotly_chart(fig, use_container_width=True, key="rainfall_trends")
         
         # Show info about filtered regions
-        total_regions = df['region'].nunique()
+        total_regions = int(df['total_regions'].iloc[0])
         if total_regions > 8:
             st.caption(f"ℹ️ Showing top 8 regions out of {total_regions} total regions with highest average rainfall")
             
     except Exception as e:
         st.error(f"Error plotting rainfall trends: {e}")
 
-def plot_alert_severity_distribution(db):
+def get_active_alerts(db):
+    """Fetch active alerts, newest first, for the severity chart and the
+    recent-alerts table (one query shared by both panels)"""
+    return cached_dataframe(db, QueryHelper.get_active_alerts_by_date())
+
+def plot_alert_severity_distribution(alerts_df):
     """Create alert severity pie chart"""
     try:
-        query = QueryHelper.get_alert_severity_distribution()
-        df = db.fetch_dataframe(query)
-        
-        if df.empty:
+        if alerts_df is None or alerts_df.empty:
             st.info("No active alerts to display")
             return
         
+        df = alerts_df.groupby('severity').size().reset_index(name='count')
+        
         colors = {
             'Critical': '#FF1744',
             'High': '#FF6F00',
@@ -319,17 +313,18 @@ def plot_alert_severity_distribution(db):
         fig.update_traces(textposition='inside', textinfo='percent+label')
         fig.update_layout(height=400)
         
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True, key="alert_severity")
     except Exception as e:
         st.error(f"Error plotting alert distribution: {e}")
 
-def plot_resource_distribution(db):
+def get_resource_distribution(db):
+    """Fetch resource quantities by type"""
+    return cached_summary(db, QueryHelper.get_resource_distribution())
+
+def plot_resource_distribution(df):
     """Create resource distribution bar chart"""
     try:
-        query = QueryHelper.get_resource_distribution()
-        df = db.fetch_dataframe(query)
-        
-        if df.empty:
+        if df is None or df.empty:
             st.info("No resource data available")
             return
         
@@ -345,51 +340,40 @@ def plot_resource_distribution(db):
         )
         
         fig.update_layout(height=400, showlegend=False)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True, key="resource_inventory")
     except Exception as e:
         st.error(f"Error plotting resource distribution: {e}")
 
-def show_recent_alerts(db):
+def show_recent_alerts(alerts_df):
     """Display recent alerts table"""
     try:
-        query = """
-            SELECT region, alert_message, severity, date_issued, expiry_date
-            FROM alerts
-            WHERE expiry_date >= CURDATE()
-            ORDER BY date_issued DESC
-            LIMIT 5
-        """
-        df = db.fetch_dataframe(query)
-        
-        if df.empty:
+        if alerts_df is None or alerts_df.empty:
             st.info("No recent alerts")
             return
         
         st.markdown("### 🚨 Recent Alerts")
         
-        # Add severity badge styling
-        def severity_badge(severity):
-            colors = {
-                'Critical': '🔴',
-                'High': '🟠',
-                'Moderate': '🟡',
-                'Low': '🟢'
-            }
-            return f"{colors.get(severity, '⚪')} {severity}"
-        
-        df['severity'] = df['severity'].apply(severity_badge)
-        st.dataframe(df, use_container_width=True, hide_index=True)
+        # The severity badges come from SQL; the raw severity column is kept
+        # for the chart, so the table shows the badge column in its place
+        st.dataframe(
+            alerts_df.head(5),
+            use_container_width=True,
+            hide_index=True,
+            column_order=['region', 'alert_message', 'severity_badge', 'date_issued', 'expiry_date'],
+            column_config={'severity_badge': 'severity'}
+        )
         
     except Exception as e:
         st.error(f"Error fetching recent alerts: {e}")
 
-def show_high_risk_regions(db):
+def get_high_risk_regions(db):
+    """Fetch high and critical risk regions"""
+    return cached_dataframe(db, QueryHelper.get_high_risk_regions())
+
+def show_high_risk_regions(df):
     """Display high-risk regions"""
     try:
-        query = QueryHelper.get_high_risk_regions()
-        df = db.fetch_dataframe(query)
-        
-        if df.empty:
+        if df is None or df.empty:
             st.success("✅ No high-risk regions currently")
             return
         
@@ -403,6 +387,29 @@ def show_high_risk_regions(db):
     except Exception as e:
         st.error(f"Error fetching high-risk regions: {e}")
 
+def load_dashboard_data(db):
+    """
+    Fetch the data for every dashboard panel at once
+    
+    The fetches are independent, so they run together on the connection's
+    shared executor and the page waits roughly as long as the slowest query
+    instead of all of them in turn. On a warm cache each one returns
+    straight away.
+    
+    Returns:
+        Dict of panel name -> fetched data
+    """
+    fetches = {
+        'kpis': get_kpi_metrics,
+        'predictions': predict_cloudburst_risk,
+        'rainfall_trends': get_rainfall_trends,
+        'alerts': get_active_alerts,
+        'resources': get_resource_distribution,
+        'high_risk': get_high_risk_regions
+    }
+    results = db.gather_calls(*(partial(fetch, db) for fetch in fetches.values()))
+    return dict(zip(fetches, results))
+
 def main():
     """Main dashboard function"""
     st.title("🏠 Home Dashboard")
@@ -415,12 +422,7 @@ def main():
     
     # Initialize database connection
     try:
-        db = init_connection(
-            host=st.session_state.db_config['host'],
-            database=st.session_state.db_config['database'],
-            user=st.session_state.db_config['user'],
-            password=st.session_state.db_config['password']
-        )
+        db = init_connection(**st.session_state.db_config)
     except Exception as e:
         st.error(f"Database connection error: {e}")
         st.stop()
@@ -429,13 +431,16 @@ def main():
     col1, col2, col3 = st.columns([6, 1, 1])
     with col3:
         if st.button("🔄 Refresh", use_container_width=True):
+            clear_query_cache()
             st.rerun()
     
     st.markdown("---")
     
+    data = load_dashboard_data(db)
+    
     # KPI Cards
     st.markdown("## 📊 Key Metrics")
-    kpis = get_kpi_metrics(db)
+    kpis = data['kpis']
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -471,7 +476,7 @@ def main():
     st.markdown("---")
     
     # Cloudburst Prediction Section
-    display_cloudburst_predictions(db)
+    display_cloudburst_predictions(data['predictions'])
     
     st.markdown("---")
     
@@ -479,10 +484,10 @@ def main():
     col1, col2 = st.columns(2)
     
     with col1:
-        plot_rainfall_trends(db)
+        plot_rainfall_trends(data['rainfall_trends'])
     
     with col2:
-        plot_alert_severity_distribution(db)
+        plot_alert_severity_distribution(data['alerts'])
     
     st.markdown("---")
     
@@ -490,36 +495,15 @@ def main():
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        plot_resource_distribution(db)
+        plot_resource_distribution(data['resources'])
     
     with col2:
         st.markdown("### 📈 Quick Stats")
         
-        # Additional stats
-        try:
-            # Average rainfall
-            avg_query = "SELECT AVG(rainfall_mm) as avg_rainfall FROM rainfall_data"
-            avg_result = db.execute_query(avg_query)
-            avg_rainfall = round(avg_result[0]['avg_rainfall'], 2) if avg_result and avg_result[0]['avg_rainfall'] else 0
-            
-            st.metric("Average Rainfall", f"{avg_rainfall} mm")
-            
-            # Regions with warnings
-            warning_query = "SELECT COUNT(*) as count FROM affected_regions WHERE warning_status = 1"
-            warning_result = db.execute_query(warning_query)
-            regions_warned = warning_result[0]['count'] if warning_result else 0
-            
-            st.metric("Regions with Warnings", regions_warned)
-            
-            # Low stock resources
-            low_stock_query = "SELECT COUNT(*) as count FROM resources WHERE quantity_available < 100"
-            low_stock_result = db.execute_query(low_stock_query)
-            low_stock = low_stock_result[0]['count'] if low_stock_result else 0
-            
-            st.metric("Low Stock Items", low_stock, delta_color="inverse")
-            
-        except Exception as e:
-            st.error(f"Error fetching additional stats: {e}")
+        # Additional stats (fetched with the KPI batch above)
+        st.metric("Average Rainfall", f"{kpis['avg_rainfall']} mm")
+        st.metric("Regions with Warnings", kpis['regions_warned'])
+        st.metric("Low Stock Items", kpis['low_stock'], delta_color="inverse")
     
     st.markdown("---")
     
@@ -527,10 +511,10 @@ def main():
     col1, col2 = st.columns(2)
     
     with col1:
-        show_recent_alerts(db)
+        show_recent_alerts(data['alerts'])
     
     with col2:
-        show_high_risk_regions(db)
+        show_high_risk_regions(data['high_risk'])
     
     # Footer
     st.markdown("---")
@@ -7,19 +7,15 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import pydeck as pdk
-from db.connection import init_connection
+from db.connection import init_connection, cached_reference
 from db.queries import QueryHelper
 from db.mapbox_helper import get_mapbox_visualizer
 from datetime import datetime, timedelta
-import sys
-from pathlib import Path
 import folium
 from folium.plugins import HeatMap
 from streamlit_folium import st_folium
 import numpy as np
 
-sys.path.append(str(Path(__file__).parent.parent))
-
 st.set_page_config(
     page_title="Rainfall Analytics - Cloudburst MS",
     page_icon="📊",
@@ -238,7 +234,7 @@ def create_rainfall_heatmap(df, mapbox_viz=None):
             )
             
             if deck:
-                st.pydeck_chart(deck)
+                st.pydeck_chart(deck, use_container_width=True)
                 
                 # Show legend
                 col1, col2, col3 = st.columns(3)
@@ -533,12 +529,7 @@ def main():
     
     # Initialize database
     try:
-        db = init_connection(
-            host=st.session_state.db_config['host'],
-            database=st.session_state.db_config['database'],
-            user=st.session_state.db_config['user'],
-            password=st.session_state.db_config['password']
-        )
+        db = init_connection(**st.session_state.db_config)
     except Exception as e:
         st.error(f"Database connection error: {e}")
         st.stop()
@@ -557,8 +548,8 @@ def main():
     # Get available regions
     try:
         regions_query = QueryHelper.get_unique_regions()
-        regions_df = db.fetch_dataframe(regions_query)
-        available_regions = regions_df['region'].tolist() if not regions_df.empty else []
+        regions_df = cached_reference(db, regions_query)
+        available_regions = regions_df['region'].tolist() if regions_df is not None and not regions_df.empty else []
     except:
         available_regions = []
     
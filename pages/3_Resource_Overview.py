@@ -7,14 +7,10 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import pydeck as pdk
-from db.connection import init_connection
+from db.connection import init_connection, clear_query_cache, cached_reference
 from db.queries import QueryHelper
 from db.mapbox_helper import get_mapbox_visualizer
 from datetime import datetime
-import sys
-from pathlib import Path
-
-sys.path.append(str(Path(__file__).parent.parent))
 
 st.set_page_config(
     page_title="Resource Overview - Cloudburst MS",
@@ -27,7 +23,7 @@ def _get_resource_status_options(db):
     Returns sorted list of statuses present in data.
     """
     try:
-        df = db.fetch_dataframe(QueryHelper.get_distinct_values('resources', 'status'))
+        df = cached_reference(db, QueryHelper.get_distinct_values('resources', 'status'))
         values = sorted([v for v in df['value'].dropna().astype(str).unique().tolist()]) if df is not None and not df.empty else []
         if values:
             return values
@@ -95,7 +91,7 @@ def get_all_resources(db):
     try:
         query = QueryHelper.get_all_resources()
         df = db.fetch_dataframe(query)
-        return df
+        return df if df is not None else pd.DataFrame()
     except Exception as e:
         st.error(f"Error fetching resources: {e}")
         return pd.DataFrame()
@@ -338,6 +334,7 @@ def add_new_resource(db):
                     params = (resource_type, quantity, location, status, last_restocked)
                     
                     if db.execute_update(query, params):
+                        clear_query_cache()
                         st.success(f"✅ Successfully added {resource_type} to {location}")
                         st.rerun()
                     else:
@@ -391,6 +388,7 @@ def update_resource_stock(db, resource_df):
                     params = (new_quantity, new_status, last_restocked, resource_id)
                     
                     if db.execute_update(query, params):
+                        clear_query_cache()
                         st.success(f"✅ Successfully updated resource ID {resource_id}")
                         st.rerun()
                     else:
@@ -410,12 +408,7 @@ def main():
     
     # Initialize database
     try:
-        db = init_connection(
-            host=st.session_state.db_config['host'],
-            database=st.session_state.db_config['database'],
-            user=st.session_state.db_config['user'],
-            password=st.session_state.db_config['password']
-        )
+        db = init_connection(**st.session_state.db_config)
     except Exception as e:
         st.error(f"Database connection error: {e}")
         st.stop()
@@ -6,15 +6,12 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from db.connection import init_connection
+from db.connection import init_connection, cached_reference
 from db.queries import QueryHelper
 from db.mapbox_helper import get_mapbox_visualizer
 from datetime import datetime, timedelta
-import sys
 from pathlib import Path
 
-sys.path.append(str(Path(__file__).parent.parent))
-
 st.set_page_config(
     page_title="Alert Center - Cloudburst MS",
     page_icon="⚠️",
@@ -26,7 +23,7 @@ def _get_alert_severity_options(db):
     Returns a sorted list of severities present in data.
     """
     try:
-        df = db.fetch_dataframe(QueryHelper.get_distinct_values('alerts', 'severity'))
+        df = cached_reference(db, QueryHelper.get_distinct_values('alerts', 'severity'))
         values = sorted([v for v in df['value'].dropna().astype(str).unique().tolist()]) if df is not None and not df.empty else []
         if values:
             return values
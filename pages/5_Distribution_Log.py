@@ -6,13 +6,9 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from db.connection import init_connection
+from db.connection import init_connection, clear_query_cache, cached_reference
 from db.queries import QueryHelper
 from datetime import datetime, timedelta
-import sys
-from pathlib import Path
-
-sys.path.append(str(Path(__file__).parent.parent))
 
 st.set_page_config(
     page_title="Distribution Log - Cloudburst MS",
@@ -24,12 +20,12 @@ def get_distributions(db, start_date=None, end_date=None):
     """Fetch distribution records"""
     try:
         if start_date and end_date:
-            query = QueryHelper.get_distributions_by_date_range(start_date, end_date)
+            query, params = QueryHelper.get_distributions_by_date_range(start_date, end_date)
         else:
-            query = QueryHelper.get_all_distributions()
+            query, params = QueryHelper.get_all_distributions(), None
         
-        df = db.fetch_dataframe(query)
-        return df
+        df = db.fetch_dataframe(query, params)
+        return df if df is not None else pd.DataFrame()
     except Exception as e:
         st.error(f"Error fetching distributions: {e}")
         return pd.DataFrame()
@@ -105,12 +101,12 @@ def add_distribution_log(db):
     # Get regions and resources
     try:
         regions_query = "SELECT region_id, region_name FROM affected_regions ORDER BY region_name"
-        regions_df = db.fetch_dataframe(regions_query)
+        regions_df = cached_reference(db, regions_query)
         
         resources_query = "SELECT resource_id, resource_type FROM resources ORDER BY resource_type"
-        resources_df = db.fetch_dataframe(resources_query)
+        resources_df = cached_reference(db, resources_query)
         
-        if regions_df.empty or resources_df.empty:
+        if regions_df is None or resources_df is None or regions_df.empty or resources_df.empty:
             st.warning("⚠️ No regions or resources available. Please add them first.")
             return
         
@@ -151,6 +147,7 @@ def add_distribution_log(db):
                              distributed_by, received_date)
                     
                     if db.execute_update(query, params):
+                        clear_query_cache()
                         st.success("✅ Successfully logged distribution")
                         st.rerun()
                     else:
@@ -170,12 +167,7 @@ def main():
     
     # Initialize database
     try:
-        db = init_connection(
-            host=st.session_state.db_config['host'],
-            database=st.session_state.db_config['database'],
-            user=st.session_state.db_config['user'],
-            password=st.session_state.db_config['password']
-        )
+        db = init_connection(**st.session_state.db_config)
     except Exception as e:
         st.error(f"Database connection error: {e}")
         st.stop()
@@ -4,13 +4,11 @@
 
 import streamlit as st
 import pandas as pd
-from db.connection import init_connection
+from db.connection import init_connection, clear_query_cache, quote_table, cached_reference
 from datetime import datetime
-import sys
 from pathlib import Path
 import plotly.express as px
-
-sys.path.append(str(Path(__file__).parent.parent))
+from config import MAX_RECORDS_DISPLAY
 
 st.set_page_config(
     page_title="Database Explorer - Cloudburst MS",
@@ -50,7 +48,7 @@ def _get_distinct_options(db, table: str, column: str, csv_filename: str, fallba
     """Fetch distinct non-null values from DB for dropdowns; fallback to CSV or provided list."""
     try:
         from db.queries import QueryHelper
-        df = db.fetch_dataframe(QueryHelper.get_distinct_values(table, column))
+        df = cached_reference(db, QueryHelper.get_distinct_values(quote_table(db, table), column))
         values = sorted([v for v in df['value'].dropna().astype(str).unique().tolist()]) if df is not None and not df.empty else []
         if values:
             return values
@@ -71,15 +69,13 @@ def _get_distinct_options(db, table: str, column: str, csv_filename: str, fallba
         pass
     return fallback or []
 
-def get_table_data(db, table_name, limit=None):
-    """Fetch data from a table"""
+def get_table_data(db, table_name, limit=MAX_RECORDS_DISPLAY):
+    """Fetch data from a table (at most limit rows; the table, CSV download
+    and delete picker all need them in memory at once)"""
     try:
-        query = f"SELECT * FROM {table_name}"
-        if limit:
-            query += f" LIMIT {limit}"
-        
-        df = db.fetch_dataframe(query)
-        return df
+        query = f"SELECT * FROM {quote_table(db, table_name)} LIMIT %s"
+        df = db.fetch_dataframe(query, (int(limit),))
+        return df if df is not None else pd.DataFrame()
     except Exception as e:
         st.error(f"Error fetching data from {table_name}: {e}")
         return pd.DataFrame()
@@ -87,7 +83,7 @@ def get_table_data(db, table_name, limit=None):
 def get_table_stats(db, table_name):
     """Get statistics for a table"""
     try:
-        count_query = f"SELECT COUNT(*) as total FROM {table_name}"
+        count_query = f"SELECT COUNT(*) as total FROM {quote_table(db, table_name)}"
         result = db.execute_query(count_query)
         total_rows = result[0]['total'] if result else 0
         
@@ -100,18 +96,19 @@ def search_table(db, table_name, search_term, columns):
     """Search across multiple columns in a table"""
     try:
         # Build search query
+        # Columns come from TABLE_INFO; the search term is bound, not spliced
         conditions = []
         for col in columns:
-            conditions.append(f"CAST({col} AS CHAR) LIKE '%{search_term}%'")
+            conditions.append(f"CAST(`{col}` AS CHAR) LIKE %s")
         
         query = f"""
-            SELECT * FROM {table_name}
+            SELECT * FROM {quote_table(db, table_name)}
             WHERE {' OR '.join(conditions)}
             LIMIT 100
         """
         
-        df = db.fetch_dataframe(query)
-        return df
+        df = db.fetch_dataframe(query, (f"%{search_term}%",) * len(columns))
+        return df if df is not None else pd.DataFrame()
     except Exception as e:
         st.error(f"Search error: {e}")
         return pd.DataFrame()
@@ -192,11 +189,12 @@ def add_record(db, table_name):
                 # Build INSERT query
                 cols = ', '.join(values.keys())
                 placeholders = ', '.join(['%s'] * len(values))
-                query = f"INSERT INTO {table_name} ({cols}) VALUES ({placeholders})"
+                query = f"INSERT INTO {quote_table(db, table_name)} ({cols}) VALUES ({placeholders})"
                 
                 params = tuple(values.values())
                 
                 if db.execute_update(query, params):
+                    clear_query_cache()
                     st.success("✅ Record added successfully!")
                     st.rerun()
                 else:
@@ -208,9 +206,10 @@ def delete_record(db, table_name, record_id):
     """Delete a record"""
     try:
         pk = TABLE_INFO[table_name]['pk']
-        query = f"DELETE FROM {table_name} WHERE {pk} = %s"
+        query = f"DELETE FROM {quote_table(db, table_name)} WHERE {pk} = %s"
         
         if db.execute_update(query, (record_id,)):
+            clear_query_cache()
             st.success(f"✅ Successfully deleted record {record_id}")
             return True
         else:
@@ -318,12 +317,7 @@ def main():
     
     # Initialize database
     try:
-        db = init_connection(
-            host=st.session_state.db_config['host'],
-            database=st.session_state.db_config['database'],
-            user=st.session_state.db_config['user'],
-            password=st.session_state.db_config['password']
-        )
+        db = init_connection(**st.session_state.db_config)
     except Exception as e:
         st.error(f"Database connection error: {e}")
         st.stop()
@@ -376,11 +370,13 @@ def main():
         df = search_table(db, selected_table, search_term, TABLE_INFO[selected_table]['columns'])
         st.info(f"Found {len(df)} matching records")
     else:
-        limit = None if show_all else 100
+        limit = MAX_RECORDS_DISPLAY if show_all else 100
         df = get_table_data(db, selected_table, limit)
         
         if not show_all and stats['total_rows'] > 100:
             st.info(f"Showing first 100 of {stats['total_rows']} records. Check 'Show All' to display all records.")
+        elif show_all and stats['total_rows'] > MAX_RECORDS_DISPLAY:
+            st.info(f"Showing first {MAX_RECORDS_DISPLAY} of {stats['total_rows']} records. Use Search to find other records.")
     
     # Display data
     if not df.empty:
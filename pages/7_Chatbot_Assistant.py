@@ -6,12 +6,9 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from datetime import datetime
-import sys
 from pathlib import Path
 import json
-from openai import OpenAI
-
-sys.path.append(str(Path(__file__).parent.parent))
+from db.openai_helper import get_openai_client
 
 st.set_page_config(
     page_title="Chatbot Assistant - Cloudburst MS",
@@ -317,7 +314,13 @@ def execute_ai_query(db, ai_assistant, user_question):
     """Execute AI-generated query and return results"""
     with st.spinner("🤖 Analyzing your question..."):
         # Generate SQL
-        query_result = ai_assistant.generate_sql_query(user_question)
+        # Stream the SQL into a preview while it is being generated
+        sql_preview = st.empty()
+        query_result = ai_assistant.generate_sql_query(
+            user_question,
+            on_update=lambda partial: sql_preview.code(partial, language="sql")
+        )
+        sql_preview.empty()
         
         if not query_result.get('success'):
             return {
@@ -344,17 +347,22 @@ def execute_ai_query(db, ai_assistant, user_question):
         try:
             df = db.fetch_dataframe(sql)
             
+            if df is None:
+                return {
+                    'type': 'error',
+                    'content': f"Query execution failed.\n\nGenerated SQL:\n```sql\n{sql}\n```"
+                }
+            
             if df.empty:
                 return {
                     'type': 'text',
                     'content': "✅ Query executed successfully, but no results found."
                 }
             
-            # Generate explanation
-            ai_explanation = ai_assistant.explain_results(sql, df, user_question)
-            
-            # Get follow-up suggestions
-            suggestions = ai_assistant.suggest_follow_up_questions(user_question, df)
+            # Generate explanation (and follow-ups, if the SQL response had none)
+            ai_explanation, suggestions = ai_assistant.describe_results(
+                sql, df, user_question, query_result.get('follow_up_questions')
+            )
             
             return {
                 'type': 'ai_response',
@@ -380,12 +388,16 @@ def execute_rag_query(rag_assistant, user_query, chat_history=None):
         result = rag_assistant.generate_rag_response(user_query, chat_history)
         
         if result['success']:
+            # The answer arrives as a stream of text chunks; show it as it
+            # comes in and keep the full text, which the chat history redraws
+            content = st.write_stream(result['response'])
+            
             # Get follow-up suggestions
             suggestions = rag_assistant.suggest_queries(result['context_used'])
             
             return {
                 'type': 'rag_response',
-                'content': result['response'],
+                'content': content,
                 'context': result['context_used'],
                 'query': result['query'],
                 'suggestions': suggestions
@@ -535,7 +547,7 @@ def main():
     client = None
     if api_key:
         try:
-            client = OpenAI(api_key=api_key)
+            client = get_openai_client(api_key)
             st.success("✅ AI-Powered Assistant Ready (using OpenAI GPT-3.5)")
         except Exception as e:
             st.warning(f"⚠️ OpenAI initialization failed: {e}. Using basic pattern matching.")
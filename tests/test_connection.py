@@ -0,0 +1,35 @@
+"""Table-name whitelisting in db.connection"""
+
+import pytest
+
+from db.connection import DatabaseConnection, list_tables, quote_table
+
+SCHEMA_TABLES = ["rainfall_data", "affected_regions", "resources", "distribution_log", "alerts"]
+
+
+@pytest.fixture
+def db():
+    """A DatabaseConnection whose information_schema lookup is canned"""
+    conn = DatabaseConnection.__new__(DatabaseConnection)
+    conn.execute_query = lambda query, params=None: [{"name": name} for name in SCHEMA_TABLES]
+    list_tables.clear()
+    yield conn
+    list_tables.clear()
+
+
+@pytest.mark.parametrize("table", SCHEMA_TABLES)
+def test_known_table_is_backquoted(db, table):
+    assert quote_table(db, table) == f"`{table}`"
+
+
+@pytest.mark.parametrize("table", [
+    "users",
+    "ALERTS",
+    "alerts`; DROP TABLE alerts; --",
+    "alerts; DELETE FROM resources",
+    "`alerts`",
+    "",
+])
+def test_unknown_or_crafted_name_is_rejected(db, table):
+    with pytest.raises(ValueError):
+        quote_table(db, table)
@@ -0,0 +1,105 @@
+"""The pandas, polars and numba MV paths must produce the same table"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from db import materialized_views as mv_module
+from db.materialized_views import refresh_mv_from_csv
+
+SORT_KEY = "region_name"
+
+
+def _day(offset: int) -> str:
+    return (pd.Timestamp.today().normalize() + pd.Timedelta(days=offset)).strftime("%Y-%m-%d")
+
+
+@pytest.fixture
+def csv_dir(tmp_path):
+    """Small CSV set with dates relative to today so the 7-day windows bite"""
+    pd.DataFrame({
+        "region_id": [1, 2, 3, 4],
+        "region_name": ["Shimla", "Manali", " Kullu ", "Tawang"],
+        "population": [229463, 115189, 18536, 11202],
+        "risk_level": ["High", "Critical", "Medium", "Low"],
+    }).to_csv(tmp_path / "affected_regions.csv", index=False)
+    pd.DataFrame({
+        "region": ["Shimla", "Shimla", "Manali", "Kullu", "Shimla"],
+        "severity": ["Low", "Critical", "Moderate", "Unknown", "High"],
+        "expiry_date": [_day(3), _day(1), _day(0), _day(2), _day(-1)],
+    }).to_csv(tmp_path / "alerts.csv", index=False)
+    pd.DataFrame({
+        "location": ["Shimla", "Shimla", "Manali", "Nowhere"],
+        "quantity_available": [100, 250, 40, 7],
+    }).to_csv(tmp_path / "resources.csv", index=False)
+    pd.DataFrame({
+        "region": ["Shimla", "Shimla", "Shimla", "Manali", "Manali", "Kullu", "Kullu", "Tawang"],
+        "date": [_day(-1), _day(-3), _day(-30), _day(-2), _day(-2), _day(-20), "not a date", _day(-1)],
+        "rainfall_mm": [12.5, 7.5, 300.0, 40.0, 80.0, 5.0, 99.0, np.nan],
+    }).to_csv(tmp_path / "rainfall_data.csv", index=False)
+    pd.DataFrame({
+        "region_id": [1, 1, 2, 9],
+        "quantity_sent": [10, 20, 30, 40],
+        "date_distributed": [_day(-2), _day(-10), _day(0), _day(-1)],
+    }).to_csv(tmp_path / "distribution_log.csv", index=False)
+    return str(tmp_path)
+
+
+def _normalized(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.sort_values(SORT_KEY).reset_index(drop=True)
+    for col in ("latest_rainfall_mm", "avg_rainfall_7d", "max_sev_rank"):
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    for col in ("region_name", "risk_level", "highest_active_severity"):
+        df[col] = df[col].astype(object).where(df[col].notna(), None)
+    df["population"] = pd.to_numeric(df["population"]).astype("int64")
+    df["region_id"] = pd.to_numeric(df["region_id"]).astype("int64")
+    return df
+
+
+def _assert_same(left: pd.DataFrame, right: pd.DataFrame) -> None:
+    assert list(left.columns) == list(right.columns)
+    pd.testing.assert_frame_equal(_normalized(left), _normalized(right), check_dtype=False)
+
+
+def test_pandas_aggregates(csv_dir):
+    mv = refresh_mv_from_csv(csv_dir).set_index(SORT_KEY)
+    
+    shimla = mv.loc["Shimla"]
+    assert shimla["active_alerts_count"] == 2
+    assert shimla["highest_active_severity"] == "Critical"
+    assert shimla["total_resources_available"] == 350
+    assert shimla["distributions_last_7d"] == 10
+    assert shimla["latest_rainfall_mm"] == 12.5
+    assert shimla["avg_rainfall_7d"] == pytest.approx(10.0)
+    
+    # Ties on the latest date keep the first row, like idxmax
+    assert mv.loc["Manali", "latest_rainfall_mm"] == 40.0
+    assert mv.loc["Kullu", "active_alerts_count"] == 1
+    assert pd.isna(mv.loc["Kullu", "avg_rainfall_7d"])
+    assert mv.loc["Tawang", "total_resources_available"] == 0
+
+
+def test_polars_matches_pandas(csv_dir):
+    pytest.importorskip("polars")
+    if mv_module.pl is None:
+        pytest.skip("polars engine unavailable")
+    
+    _assert_same(refresh_mv_from_csv(csv_dir, engine="pandas"),
+                 refresh_mv_from_csv(csv_dir, engine="polars"))
+
+
+def test_rain_loop_matches_pandas(csv_dir, monkeypatch):
+    # The uncompiled loop is the numba kernel's source, so this runs without numba
+    expected = refresh_mv_from_csv(csv_dir)
+    
+    monkeypatch.setattr(mv_module, "_agg_rain_kernel", mv_module._agg_rain_loop)
+    monkeypatch.setattr(mv_module, "NUMBA_MIN_ROWS", 0)
+    _assert_same(expected, refresh_mv_from_csv(csv_dir))
+
+
+def test_numba_kernel_matches_pandas(csv_dir, monkeypatch):
+    pytest.importorskip("numba")
+    expected = refresh_mv_from_csv(csv_dir)
+    
+    monkeypatch.setattr(mv_module, "NUMBA_MIN_ROWS", 0)
+    _assert_same(expected, refresh_mv_from_csv(csv_dir))
@@ -0,0 +1,73 @@
+"""Safety checks on AI-generated SQL"""
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+
+from db import openai_helper
+from db.openai_helper import OpenAIAssistant
+
+DANGEROUS = [
+    "DROP TABLE alerts",
+    "DELETE FROM resources WHERE 1=1",
+    "UPDATE resources SET quantity_available = 0",
+    "INSERT INTO alerts (region) VALUES ('x')",
+    "TRUNCATE TABLE rainfall_data",
+    "ALTER TABLE alerts ADD COLUMN x INT",
+    "SELECT * FROM alerts; DROP TABLE alerts",
+]
+
+
+@pytest.fixture(params=["keyword_scan", "sqlglot"])
+def assistant(request, monkeypatch):
+    """An assistant without an API client, on either validation path"""
+    if request.param == "sqlglot":
+        pytest.importorskip("sqlglot")
+    else:
+        monkeypatch.setattr(openai_helper, "sqlglot", None)
+    return OpenAIAssistant.__new__(OpenAIAssistant)
+
+
+@pytest.mark.parametrize("sql", DANGEROUS)
+def test_dangerous_statements_are_rejected(assistant, sql):
+    result = assistant.validate_sql(sql)
+    assert result["valid"] is False
+    assert result["error"]
+
+
+def test_select_without_limit_gets_one(assistant):
+    result = assistant.validate_sql("SELECT region FROM alerts")
+    assert result["valid"] is True
+    assert "limit 1000" in result["sql"].lower()
+
+
+def test_existing_limit_is_kept(assistant):
+    result = assistant.validate_sql("SELECT region FROM alerts LIMIT 5")
+    assert result["valid"] is True
+    assert "limit 5" in result["sql"].lower()
+    assert "1000" not in result["sql"]
+
+
+def test_column_names_containing_keywords_are_allowed(assistant):
+    result = assistant.validate_sql("SELECT created_at, updated_by FROM alerts")
+    assert result["valid"] is True
+
+
+def test_sqlglot_drops_executable_comments():
+    pytest.importorskip("sqlglot")
+    assistant = OpenAIAssistant.__new__(OpenAIAssistant)
+    
+    result = assistant.validate_sql("SELECT region FROM alerts /*! ; DROP TABLE alerts */")
+    assert result["valid"] is True
+    assert "drop" not in result["sql"].lower()
+
+
+def test_sqlglot_allows_keywords_inside_string_literals():
+    # The keyword scan can't tell a string literal from a statement; the
+    # parser can
+    pytest.importorskip("sqlglot")
+    assistant = OpenAIAssistant.__new__(OpenAIAssistant)
+    
+    result = assistant.validate_sql("SELECT * FROM alerts WHERE alert_message = 'delete pending'")
+    assert result["valid"] is True
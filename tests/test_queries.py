@@ -0,0 +1,52 @@
+"""QueryHelper returns (sql, params) for every query that takes a value"""
+
+import pytest
+
+from db.queries import QueryHelper
+
+INJECTION = "x' OR '1'='1"
+
+PARAMETERIZED = [
+    ("get_all_rainfall_data", (50, 100)),
+    ("get_rainfall_by_region", (INJECTION,)),
+    ("get_rainfall_by_date_range", ("2025-08-01", INJECTION)),
+    ("get_top_rainfall_regions", (5,)),
+    ("get_top_region_rainfall_trends", (30, 8)),
+    ("get_resources_by_status", (INJECTION,)),
+    ("get_resources_by_location", (INJECTION,)),
+    ("get_low_stock_resources", (100,)),
+    ("get_alerts_by_severity", (INJECTION,)),
+    ("get_alerts_by_region", (INJECTION,)),
+    ("get_distributions_by_region", (3,)),
+    ("get_distributions_by_date_range", ("2025-08-01", INJECTION)),
+]
+
+
+@pytest.mark.parametrize("name, args", PARAMETERIZED)
+def test_values_are_bound_not_spliced(name, args):
+    sql, params = getattr(QueryHelper, name)(*args)
+    
+    assert isinstance(sql, str)
+    assert isinstance(params, tuple)
+    assert sql.count("%s") == len(params)
+    assert INJECTION not in sql
+    for arg in args:
+        assert arg in params
+
+
+@pytest.mark.parametrize("name, args", PARAMETERIZED)
+def test_statement_text_is_constant(name, args):
+    # Same text for different values, so the server sees one statement
+    first, _ = getattr(QueryHelper, name)(*args)
+    second, _ = getattr(QueryHelper, name)(*[
+        arg + 1 if isinstance(arg, int) else arg + "-other" for arg in args
+    ])
+    assert first == second
+
+
+def test_numeric_params_are_coerced_to_int():
+    _, params = QueryHelper.get_all_rainfall_data("10", "20")
+    assert params == (10, 20)
+    
+    _, params = QueryHelper.get_top_rainfall_regions(7.0)
+    assert params == (7,)